@@ -8,14 +8,34 @@ class AbstractRepository(ABC):
     async def create(self, entity_data: dict):
         """Создать сущность."""
 
+    @abstractmethod
+    async def create_or_none(self, entity_data: dict) -> model:
+        """Создать сущность одним запросом. None - если нарушена уникальность."""
+
     @abstractmethod
     async def find_one_or_none(self, **filter_by) -> model:
         """Получить сущность по фильтру."""
 
+    @abstractmethod
+    async def find_row(self, columns: list, *conditions, **filter_by):
+        """Получить только указанные колонки одной сущности по фильтру."""
+
+    @abstractmethod
+    async def find_rows(self, columns: list, *conditions, **filter_by) -> list:
+        """Получить только указанные колонки всех сущностей по фильтру."""
+
     @abstractmethod
     async def get_all(self, **filter_by) -> list[model]:
         """Вывести список всех сущностей."""
 
+    @abstractmethod
+    async def get_page(self, columns: list, limit: int, after=None, **filter_by) -> list:
+        """Страница сущностей после ключа after: только указанные колонки."""
+
+    @abstractmethod
+    async def insert_many(self, entities_data: list[dict], returning: list) -> list:
+        """Вставить пачку сущностей, пропуская конфликты. Возвращает вставленные."""
+
     @abstractmethod
     async def update(self, entity: model, updates: dict) -> model:
         """Обновить сущность."""
@@ -0,0 +1,27 @@
+from abc import ABC, abstractmethod
+
+
+class AbstractUnitOfWork(ABC):
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type:
+            await self.rollback()
+        await self.close()
+
+    @abstractmethod
+    async def commit(self):
+        """Зафиксировать все изменения единицы работы."""
+
+    @abstractmethod
+    async def rollback(self):
+        """Откатить все изменения единицы работы."""
+
+    @abstractmethod
+    async def release_reads(self):
+        """Завершить транзакции, в которых было только чтение, и вернуть их соединения."""
+
+    @abstractmethod
+    async def close(self):
+        """Освободить ресурсы единицы работы."""
@@ -5,16 +5,21 @@ from app.config.main import settings
 from app.models.user import User
 from app.schemas.user import SLoginAnswer, SUserAuth, SUserRegister, SUserUpdate
 from app.services.users import UserService
-from app.utils.dependencies import get_current_user
+from app.utils.claims import Principal
+from app.utils.dependencies import cookie_scheme, get_current_principal
+from app.utils.serialization import login_answer_serializer
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
 
 @router.post("/register/", status_code=status.HTTP_201_CREATED, summary="Регистрация пользователя")
 async def register_user(
-    user_data: SUserRegister, background_tasks: BackgroundTasks, service: UserService = Depends(UserService)
+    user_data: SUserRegister,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    service: UserService = Depends(UserService),
 ):
-    return await service.register(user_data, background_tasks)
+    return await service.register(user_data, background_tasks, client_ip=request.client.host)
 
 
 @router.get("/confirm", summary="Подтверждение email пользователя", include_in_schema=False)
@@ -23,9 +28,14 @@ async def confirm_email(token: str, service: UserService = Depends(UserService))
 
 
 @router.post("/login/", summary="Аутентификация пользователя", response_model=SLoginAnswer)
-async def auth_user(user_data: SUserAuth, response: Response, service: UserService = Depends(UserService)):
+async def auth_user(
+    user_data: SUserAuth, request: Request, response: Response, service: UserService = Depends(UserService)
+):
     """Введите email и пароль, указанные при регистрации."""
-    return await service.authenticate_user(user_data, response=response)
+    tokens = await service.authenticate_user(user_data, response=response, client_ip=request.client.host)
+    if settings.FAST_JSON_ENABLED:
+        return login_answer_serializer.response(tokens, response)
+    return tokens
 
 
 @router.post("/refresh/", summary="Обновление access и refresh токенов", response_model=SLoginAnswer)
@@ -33,11 +43,27 @@ async def refresh_tokens(request: Request, response: Response, service: UserServ
     access_token = request.cookies.get(settings.ACCESS_TOKEN_NAME)
     if not access_token:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Access-токен отсутствует")
-    return await service.refresh_tokens(access_token, response)
+    tokens = await service.refresh_tokens(access_token, response)
+    if settings.FAST_JSON_ENABLED:
+        return login_answer_serializer.response(tokens, response)
+    return tokens
 
 
 @router.get("/logout/", status_code=status.HTTP_200_OK, summary="Выход пользователя из системы")
 async def logout_user(
-    response: Response, user: User = Depends(get_current_user), service: UserService = Depends(UserService)
+    response: Response,
+    access_token: str = Depends(cookie_scheme),
+    user: Principal | User = Depends(get_current_principal),
+    service: UserService = Depends(UserService),
+):
+    return await service.logout(user.id, access_token, response)
+
+
+@router.get("/logout_all/", status_code=status.HTTP_200_OK, summary="Выход пользователя на всех устройствах")
+async def logout_user_everywhere(
+    response: Response,
+    access_token: str = Depends(cookie_scheme),
+    user: Principal | User = Depends(get_current_principal),
+    service: UserService = Depends(UserService),
 ):
-    return await service.logout(user.id, response)
+    return await service.logout_all(user.id, access_token, response)
@@ -0,0 +1,13 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from app.utils.metrics import metrics
+
+router = APIRouter(tags=["Monitoring"])
+
+
+@router.get("/metrics", include_in_schema=False)
+def get_metrics() -> Response:
+    """Метрики в формате Prometheus. Подключается только при METRICS_ENABLED=true."""
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
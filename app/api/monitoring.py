@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends
+
+from app.config.database import engine, pool_stats, replica_engine
+from app.config.redis import redis_for_auth
+from app.models.user import User
+from app.utils.dependencies import get_current_admin_user
+from app.utils.hashing import password_hasher
+from app.utils.outbox import email_outbox
+from app.utils.principal_cache import principal_cache
+from app.utils.rate_limit import rate_limiter
+from app.utils.revocation import revocation_list
+from app.utils.security import token_cache
+
+router = APIRouter(prefix="/monitoring", tags=["Monitoring"])
+
+
+@router.get("/stats/", summary="Статистика внутренних подсистем сервиса (только для админа)")
+async def get_stats(user: User = Depends(get_current_admin_user)):
+    return {
+        "hashing": password_hasher.stats(),
+        "database": {"primary": pool_stats(engine), "replica": pool_stats(replica_engine)},
+        "principal_cache": principal_cache.stats(),
+        "token_cache": token_cache.stats(),
+        "rate_limiter": rate_limiter.stats(),
+        "redis": redis_for_auth.stats(),
+        "revocation": revocation_list.stats(),
+        "email_outbox": await email_outbox.stats(),
+    }
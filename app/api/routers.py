@@ -1,7 +1,11 @@
 from app.api.auth import router as auth_router
+from app.api.monitoring import router as monitoring_router
 from app.api.users import router as users_router
+from app.api.well_known import router as well_known_router
 
 all_routers = [
     auth_router,
     users_router,
+    monitoring_router,
+    well_known_router,
 ]
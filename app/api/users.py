@@ -1,20 +1,74 @@
-from typing import List
+from typing import Literal
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request, UploadFile
+from fastapi.responses import Response, StreamingResponse
 
+from app.config.main import settings
 from app.models.user import User
-from app.schemas.user import SUserMe
+from app.schemas.user import SUserMe, SUsersPage
+from app.services.user_import import UserImportService, read_records
 from app.services.users import UserService
 from app.utils.dependencies import get_current_admin_user, get_current_user
+from app.utils.etag import is_not_modified, not_modified, page_etag, set_etag, user_etag
+from app.utils.export import EXPORT_MEDIA_TYPES
+from app.utils.serialization import user_me_serializer
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
 
 @router.get("/me/", summary="Авторизованный пользователь получает данные о себе", response_model=SUserMe)
-async def get_me(user_data: User = Depends(get_current_user)):
+async def get_me(request: Request, response: Response, user_data: User = Depends(get_current_user)):
+    """Ответ с ETag. Повторный запрос с If-None-Match получает 304 без тела."""
+    etag = user_etag(user_data)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    if settings.FAST_JSON_ENABLED:
+        return user_me_serializer.response(user_data, response)
     return user_data
 
 
-@router.get("/all_users/", summary="Только админ может получить список пользователей", response_model=List[SUserMe])
-async def get_all_users(user: User = Depends(get_current_admin_user), service: UserService = Depends(UserService)):
-    return await service.get_all_users()
+@router.get("/all_users/", summary="Только админ может получить список пользователей", response_model=SUsersPage)
+async def get_all_users(
+    request: Request,
+    response: Response,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: str | None = Query(None, description="next_cursor из предыдущей страницы"),
+    is_active: bool | None = None,
+    is_admin: bool | None = None,
+    user: User = Depends(get_current_admin_user),
+    service: UserService = Depends(UserService),
+):
+    page = await service.get_users_page(limit, cursor, is_active=is_active, is_admin=is_admin)
+    etag = page_etag(page["items"], page["next_cursor"])
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    return page
+
+
+@router.get("/export/", summary="Только админ может выгрузить всех пользователей в NDJSON или CSV")
+async def export_users(
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    is_active: bool | None = None,
+    is_admin: bool | None = None,
+    user: User = Depends(get_current_admin_user),
+    service: UserService = Depends(UserService),
+):
+    return StreamingResponse(
+        service.export_users(export_format, is_active=is_active, is_admin=is_admin),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="users.{export_format}"'},
+    )
+
+
+@router.post("/import/", summary="Только админ может массово импортировать пользователей из CSV или NDJSON")
+async def import_users(
+    file: UploadFile,
+    import_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    activate: bool = Query(True, description="Сразу активировать импортированных пользователей"),
+    user: User = Depends(get_current_admin_user),
+    service: UserImportService = Depends(UserImportService),
+):
+    """Поля: email, phone, first_name, last_name и password или password_hash (bcrypt)."""
+    return await service.run(read_records(file.file, import_format), activate=activate)
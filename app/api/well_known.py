@@ -0,0 +1,22 @@
+import hashlib
+
+from fastapi import APIRouter, Request, status
+from fastapi.responses import Response
+
+from app.config.main import settings
+from app.utils.security import key_ring
+
+router = APIRouter(prefix="/.well-known", tags=["Well-known"])
+
+JWKS_ETAG = f'"{hashlib.sha256(key_ring.jwks_json).hexdigest()[:32]}"'
+JWKS_HEADERS = {
+    "Cache-Control": f"public, max-age={settings.JWKS_CACHE_MAX_AGE_SECONDS}",
+    "ETag": JWKS_ETAG,
+}
+
+
+@router.get("/jwks.json", summary="Публичные ключи для проверки токенов", include_in_schema=False)
+async def get_jwks(request: Request):
+    if request.headers.get("if-none-match") == JWKS_ETAG:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=JWKS_HEADERS)
+    return Response(content=key_ring.jwks_json, media_type="application/json", headers=JWKS_HEADERS)
@@ -0,0 +1,40 @@
+"""Выгрузка пользователей без пароля.
+
+python -m app.cli.export_users --format csv --output users.csv
+"""
+
+import argparse
+import asyncio
+import sys
+
+from app.config.database import engine, replica_engine
+from app.repositories.unit_of_work import SQLAlchemyUnitOfWork
+from app.services.users import UserService
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Потоковая выгрузка пользователей в NDJSON или CSV")
+    parser.add_argument("--format", dest="export_format", choices=["ndjson", "csv"], default="ndjson")
+    parser.add_argument("--output", help="Файл для записи, по умолчанию stdout")
+    parser.add_argument("--active", dest="is_active", action=argparse.BooleanOptionalAction, default=None)
+    parser.add_argument("--admin", dest="is_admin", action=argparse.BooleanOptionalAction, default=None)
+    return parser.parse_args()
+
+
+async def main(args: argparse.Namespace):
+    output = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        async with SQLAlchemyUnitOfWork() as uow:
+            chunks = UserService(uow).export_users(args.export_format, is_active=args.is_active, is_admin=args.is_admin)
+            async for chunk in chunks:
+                output.write(chunk)
+    finally:
+        if args.output:
+            output.close()
+        for db_engine in (engine, replica_engine):
+            if db_engine is not None:
+                await db_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
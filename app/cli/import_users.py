@@ -0,0 +1,38 @@
+"""Массовый импорт пользователей.
+
+python -m app.cli.import_users --format csv --input users.csv
+"""
+
+import argparse
+import asyncio
+import json
+
+from app.config.database import engine, replica_engine
+from app.repositories.unit_of_work import SQLAlchemyUnitOfWork
+from app.services.user_import import UserImportService, read_records
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Импорт пользователей из CSV или NDJSON")
+    parser.add_argument("--input", required=True, help="Файл с пользователями")
+    parser.add_argument("--format", dest="import_format", choices=["ndjson", "csv"], default="ndjson")
+    parser.add_argument(
+        "--activate", action=argparse.BooleanOptionalAction, default=True, help="Сразу активировать пользователей"
+    )
+    return parser.parse_args()
+
+
+async def main(args: argparse.Namespace):
+    try:
+        with open(args.input, "rb") as stream:
+            async with SQLAlchemyUnitOfWork() as uow:
+                report = await UserImportService(uow).run(read_records(stream, args.import_format), args.activate)
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    finally:
+        for db_engine in (engine, replica_engine):
+            if db_engine is not None:
+                await db_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
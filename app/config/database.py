@@ -1,15 +1,83 @@
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+import time
+
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from app.config.main import settings
+from app.utils import query_log
+from app.utils.metrics import metrics
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Пул соединений, считающий время ожидания свободного соединения."""
+
+    metrics_name = "primary"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            wait = time.perf_counter() - started
+            self.checkouts += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            metrics.observe_pool_wait(self.metrics_name, wait)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics_name = self.metrics_name
+        return pool
+
 
 DATABASE_URL = settings.DATABASE_URL
-DATABASE_PARAMS = {}
+DATABASE_REPLICA_URL = settings.DATABASE_REPLICA_URL
+DATABASE_PARAMS = {
+    "poolclass": TimedQueuePool,
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+    "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+    "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    "connect_args": {"prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE},
+}
 
 
 engine = create_async_engine(DATABASE_URL, **DATABASE_PARAMS)
 async_session = async_sessionmaker(engine, expire_on_commit=False)
 
+replica_engine = create_async_engine(DATABASE_REPLICA_URL, **DATABASE_PARAMS) if DATABASE_REPLICA_URL else None
+async_replica_session = async_sessionmaker(replica_engine, expire_on_commit=False) if replica_engine else async_session
+
+metrics.instrument_engine(engine, "primary")
+metrics.instrument_engine(replica_engine, "replica")
+query_log.instrument_engine(engine, "primary")
+query_log.instrument_engine(replica_engine, "replica")
+
+
+def pool_stats(db_engine: AsyncEngine | None) -> dict | None:
+    if db_engine is None:
+        return None
+    pool = db_engine.pool
+    checkouts = pool.checkouts or 1
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "utilisation": round(pool.checkedout() / (pool.size() + settings.DB_MAX_OVERFLOW), 4),
+        "checkouts": pool.checkouts,
+        "avg_wait_ms": round(pool.wait_total / checkouts * 1000, 3),
+        "max_wait_ms": round(pool.wait_max * 1000, 3),
+    }
+
 
 class Base(DeclarativeBase):
     pass
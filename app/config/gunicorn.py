@@ -0,0 +1,108 @@
+"""Конфигурация gunicorn: gunicorn app.main:app -c python:app.config.gunicorn
+
+Число воркеров по умолчанию равно числу доступных процессу CPU с учётом лимитов cgroup.
+Приложение загружается в мастере до fork (preload), соединения с БД и Redis открываются уже
+в воркерах: Redis - в lifespan, пулы SQLAlchemy сбрасываются в post_fork.
+"""
+
+import math
+import os
+import shutil
+from pathlib import Path
+
+from uvicorn.workers import UvicornWorker as BaseUvicornWorker
+
+from app.config.main import settings
+
+# Воркеры пишут метрики в общий каталог. Переменная и каталог нужны до импорта prometheus_client:
+# при preload приложение загружается в мастере раньше on_starting
+if settings.METRICS_ENABLED:
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", settings.METRICS_MULTIPROC_DIR)
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+
+class UvicornWorker(BaseUvicornWorker):
+    CONFIG_KWARGS = {"loop": settings.SERVER_LOOP, "http": settings.SERVER_HTTP, "lifespan": "on"}
+
+
+def _cgroup_cpu_limit() -> tuple[float, str] | None:
+    try:
+        quota, period = Path("/sys/fs/cgroup/cpu.max").read_text().split()
+        if quota != "max":
+            return int(quota) / int(period), "cgroup v2 cpu.max"
+    except (OSError, ValueError):
+        pass
+    try:
+        quota = int(Path("/sys/fs/cgroup/cpu/cpu.cfs_quota_us").read_text())
+        period = int(Path("/sys/fs/cgroup/cpu/cpu.cfs_period_us").read_text())
+        if quota > 0:
+            return quota / period, "cgroup v1 cpu.cfs_quota_us"
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def available_cpus() -> tuple[int, str]:
+    """Число CPU, доступных процессу, и откуда оно взято: меньшее из привязки к ядрам и квоты cgroup."""
+    if hasattr(os, "sched_getaffinity"):
+        cpus, source = len(os.sched_getaffinity(0)), "cpu affinity"
+    else:
+        cpus, source = os.cpu_count() or 1, "cpu count"
+    limit = _cgroup_cpu_limit()
+    if limit and math.ceil(limit[0]) < cpus:
+        cpus, source = math.ceil(limit[0]), limit[1]
+    return max(1, cpus), source
+
+
+CPUS, CPU_SOURCE = available_cpus()
+
+bind = settings.SERVER_BIND
+workers = settings.SERVER_WORKERS or max(1, round(CPUS * settings.SERVER_WORKERS_PER_CPU))
+worker_class = "app.config.gunicorn.UvicornWorker"
+preload_app = settings.SERVER_PRELOAD
+max_requests = settings.SERVER_MAX_REQUESTS
+max_requests_jitter = settings.SERVER_MAX_REQUESTS_JITTER
+timeout = settings.SERVER_TIMEOUT_SECONDS
+graceful_timeout = settings.SERVER_GRACEFUL_TIMEOUT_SECONDS
+keepalive = settings.SERVER_KEEPALIVE_SECONDS
+
+
+def on_starting(server):
+    # Файлы прошлых запусков и мастера (он не обслуживает запросы) не должны попасть в /metrics
+    multiproc_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if multiproc_dir:
+        shutil.rmtree(multiproc_dir, ignore_errors=True)
+        os.makedirs(multiproc_dir, exist_ok=True)
+
+
+def when_ready(server):
+    databases = 2 if settings.DATABASE_REPLICA_URL else 1
+    db_connections = workers * databases * (settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW)
+    server.log.info(
+        f"Serving on {bind}: {workers} workers ({CPUS} CPUs from {CPU_SOURCE}), "
+        f"loop={settings.SERVER_LOOP}, http={settings.SERVER_HTTP}, preload={preload_app}"
+    )
+    server.log.info(
+        f"Effective concurrency: bcrypt {workers * settings.HASHING_MAX_WORKERS} {settings.HASHING_EXECUTOR}s, "
+        f"up to {db_connections} DB connections, up to {workers * settings.REDIS_MAX_CONNECTIONS} Redis connections"
+    )
+    server.log.info(
+        f"Recycling after {max_requests}+{max_requests_jitter} requests, "
+        f"timeout {timeout}s, graceful shutdown {graceful_timeout}s"
+    )
+
+
+def post_fork(server, worker):
+    # Соединения, открытые в мастере при preload, не должны использоваться несколькими процессами
+    from app.config.database import engine, replica_engine
+
+    for db_engine in (engine, replica_engine):
+        if db_engine is not None:
+            db_engine.sync_engine.dispose(close=False)
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
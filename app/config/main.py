@@ -1,3 +1,6 @@
+from typing import Literal
+
+from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -9,30 +12,133 @@ class Settings(BaseSettings):
     POSTGRES_PORT: int = 5432
     POSTGRES_USER: str = "postgres"
     POSTGRES_PASSWORD: str = "postgres"
+    POSTGRES_REPLICA_HOST: str | None = None
+    POSTGRES_REPLICA_PORT: int | None = None
+
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 500
+    EXPORT_BATCH_SIZE: int = 1000
+    IMPORT_BATCH_SIZE: int = 1000
+    IMPORT_HASHING_PROCESSES: int | None = None
+    IMPORT_MAX_REPORTED_ERRORS: int = 1000
 
     REDIS_HOST: str = "redis"
     REDIS_PORT: int = 6379
     REDIS_DB: int = 0
+    REDIS_SENTINELS: str = ""
+    REDIS_SENTINEL_MASTER: str = "mymaster"
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_POOL_TIMEOUT_SECONDS: float = 5
+    REDIS_SOCKET_TIMEOUT_SECONDS: float = 5
+    REDIS_CONNECT_TIMEOUT_SECONDS: float = 2
+    REDIS_HEALTH_CHECK_INTERVAL_SECONDS: int = 30
+    REDIS_RETRY_ATTEMPTS: int = 3
+    REDIS_HASH_TAGS: bool = False
+    REDIS_CLIENT_CACHE_ENABLED: bool = False
+    REDIS_CLIENT_CACHE_SIZE: int = 10_000
+    REDIS_CLIENT_CACHE_TTL_SECONDS: int = 300
 
     SMTP_HOST: str = "smtp.gmail.com"
     SMTP_PORT: int = 587
     SMTP_USER: str = "example@gmail.com"
     SMTP_PASSWORD: str
+    SMTP_START_TLS: bool = True
+    SMTP_TIMEOUT_SECONDS: float = 30
+    SMTP_MESSAGES_PER_CONNECTION: int = 100
+
+    EMAIL_OUTBOX_ENABLED: bool = False
+    EMAIL_OUTBOX_STREAM: str = "outbox:email"
+    EMAIL_OUTBOX_MAXLEN: int = 100_000
+    EMAIL_WORKER_SMTP_CONNECTIONS: int = 4
+    EMAIL_WORKER_BATCH_SIZE: int = 50
+    EMAIL_WORKER_CLAIM_IDLE_SECONDS: int = 60
+    EMAIL_MAX_ATTEMPTS: int = 5
+    EMAIL_RETRY_BASE_SECONDS: float = 5
 
     DOMAIN: str
     REDIRECT_URL: str
 
     SECRET_KEY: str = "secret"
     ALGORITHM: str = "HS256"
+    JWT_KEYS_DIR: str = "keys"
+    JWT_ACTIVE_KID: str | None = None
+    JWKS_CACHE_MAX_AGE_SECONDS: int = 300
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     ACCESS_TOKEN_NAME: str = "access_token"
     REFRESH_TOKEN_EXPIRE_SECONDS: int = 14 * 24 * 3600
+    REFRESH_ROTATION_GRACE_SECONDS: int = 10
     CONFIRM_TOKEN_EXPIRE_SECONDS: int = 3600
+    STATELESS_AUTH: bool = False
+    REVOCATION_BLOOM_CAPACITY: int = 100_000
+    REVOCATION_BLOOM_ERROR_RATE: float = 0.001
+    REVOCATION_REBUILD_SECONDS: int = 600
+    TOKEN_CACHE_SIZE: int = 10_000
+    TOKEN_CACHE_TTL_SECONDS: int = 3600
+
+    RATE_LIMIT_ENABLED: bool = True
+    LOGIN_LIMIT_PER_IP: int = 20
+    LOGIN_LIMIT_PER_EMAIL: int = 10
+    LOGIN_LIMIT_GLOBAL: int = 2000
+    LOGIN_LIMIT_WINDOW_SECONDS: int = 60
+    REGISTER_LIMIT_PER_IP: int = 5
+    REGISTER_LIMIT_GLOBAL: int = 500
+    REGISTER_LIMIT_WINDOW_SECONDS: int = 60
+
+    HASHING_EXECUTOR: Literal["thread", "process"] = "thread"
+    HASHING_MAX_WORKERS: int = 4
+    HASHING_QUEUE_SIZE: int = 64
+
+    PRINCIPAL_CACHE_ENABLED: bool = True
+    PRINCIPAL_CACHE_SIZE: int = 10_000
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 30
+    PRINCIPAL_CACHE_REDIS_TTL_SECONDS: int = 300
+
+    FAST_JSON_ENABLED: bool = False
+
+    SERVER_BIND: str = "0.0.0.0:8000"
+    SERVER_WORKERS: int | None = None
+    SERVER_WORKERS_PER_CPU: float = 1
+    SERVER_LOOP: Literal["uvloop", "asyncio", "auto"] = "uvloop"
+    SERVER_HTTP: Literal["httptools", "h11", "auto"] = "httptools"
+    SERVER_PRELOAD: bool = True
+    SERVER_MAX_REQUESTS: int = 10_000
+    SERVER_MAX_REQUESTS_JITTER: int = 1000
+    SERVER_TIMEOUT_SECONDS: int = 60
+    SERVER_GRACEFUL_TIMEOUT_SECONDS: int = 30
+    SERVER_KEEPALIVE_SECONDS: int = 5
+
+    METRICS_ENABLED: bool = False
+    METRICS_MULTIPROC_DIR: str = "/tmp/prometheus_multiproc"
+    EMAIL_WORKER_METRICS_PORT: int = 9101
+
+    PROFILING_ENABLED: bool = False
+    PROFILING_HEADER: str = "X-Profile"
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_DIR: str = "profiles"
+    PROFILING_INTERVAL_SECONDS: float = 0.001
+    SLOW_QUERY_THRESHOLD_MS: float = 0
+
+    @field_validator("POSTGRES_REPLICA_PORT", "IMPORT_HASHING_PROCESSES", "SERVER_WORKERS", mode="before")
+    @classmethod
+    def empty_as_none(cls, value):
+        """Пустое значение необязательной настройки в .env - не задано."""
+        return None if value == "" else value
 
     @property
     def DATABASE_URL(self):
         return f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
 
+    @property
+    def DATABASE_REPLICA_URL(self):
+        if not self.POSTGRES_REPLICA_HOST:
+            return None
+        port = self.POSTGRES_REPLICA_PORT or self.POSTGRES_PORT
+        return f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_REPLICA_HOST}:{port}/{self.POSTGRES_DB}"
+
     @property
     def REDIS_URL(self):
         return f"redis://{self.REDIS_HOST}:{self.REDIS_PORT}/{self.REDIS_DB}"
@@ -1,23 +1,259 @@
+import asyncio
+import time
+
+from loguru import logger
 from redis import asyncio as aioredis
+from redis.asyncio.client import Pipeline
+from redis.asyncio.retry import Retry
+from redis.asyncio.sentinel import Sentinel, SentinelConnectionPool
+from redis.backoff import ExponentialBackoff
+from redis.exceptions import ConnectionError, TimeoutError
 
 from app.config.main import settings
+from app.utils.lru import TTLCache
+from app.utils.metrics import metrics
+from app.utils.spans import record_span
+
+INVALIDATION_CHANNEL = "__redis__:invalidate"
+
+
+class CommandLatency:
+    """Число вызовов, среднее и максимальное время команд Redis."""
+
+    def __init__(self):
+        self._commands: dict[str, list] = {}
+
+    def observe(self, command: str, elapsed: float):
+        metrics.observe_redis(command, elapsed)
+        record_span("redis", command, elapsed)
+        entry = self._commands.get(command)
+        if entry is None:
+            self._commands[command] = [1, elapsed, elapsed]
+            return
+        entry[0] += 1
+        entry[1] += elapsed
+        entry[2] = max(entry[2], elapsed)
+
+    def stats(self) -> dict:
+        return {
+            command: {"calls": calls, "avg_ms": round(total / calls * 1000, 3), "max_ms": round(peak * 1000, 3)}
+            for command, (calls, total, peak) in sorted(self._commands.items())
+        }
+
+
+class TimedPipeline(Pipeline):
+    def __init__(self, latency: CommandLatency, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latency = latency
+
+    async def execute(self, raise_on_error: bool = True):
+        started = time.perf_counter()
+        try:
+            return await super().execute(raise_on_error)
+        finally:
+            self.latency.observe("MULTI" if self.is_transaction else "PIPELINE", time.perf_counter() - started)
+
+
+class BlockingSentinelConnectionPool(SentinelConnectionPool, aioredis.BlockingConnectionPool):
+    """Пул соединений с мастером из Sentinel, который при исчерпании ждёт свободное соединение до timeout,
+    как BlockingConnectionPool без Sentinel, а не сразу отвечает ошибкой "Too many connections"."""
 
 
 class RedisService(aioredis.Redis):
-    def __init__(self, url: str, **kwargs):
+    """Клиент Redis приложения: пул с ограничением и таймаутами, повторы при обрыве соединения,
+    Sentinel, локальный кэш читаемых ключей и статистика задержек.
+
+    Кэш работает для ключей с префиксами tracked_prefixes через cached_get: Redis сообщает об их
+    изменении по CLIENT TRACKING BCAST в отдельное соединение, подписанное на __redis__:invalidate.
+    Пока это соединение не установлено, cached_get читает напрямую из Redis.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        max_connections: int = 50,
+        pool_timeout: float = 5,
+        sentinels: list[tuple[str, int]] | None = None,
+        sentinel_master: str = "mymaster",
+        db: int = 0,
+        hash_tags: bool = False,
+        tracked_prefixes: tuple[str, ...] = (),
+        client_cache_size: int = 0,
+        client_cache_ttl: float = 300,
+        **connection_kwargs,
+    ):
         self.url = url
+        self.max_connections = max_connections
+        self.pool_timeout = pool_timeout
+        self.sentinels = sentinels or []
+        self.sentinel_master = sentinel_master
+        self.db = db
+        self.hash_tags = hash_tags
+        self.tracked_prefixes = tracked_prefixes if client_cache_size > 0 else ()
+        self._pool_kwargs = {"decode_responses": True, **connection_kwargs}
+        self.latency = CommandLatency()
+        self.client_cache = TTLCache(maxsize=client_cache_size, ttl=client_cache_ttl)
+        self.invalidations = 0
+        self._tracking = False
+        self._tracking_task: asyncio.Task | None = None
         self._connection_pool = None
-        super().__init__(connection_pool=None, **kwargs)
+        super().__init__(connection_pool=None)
+
+    def _create_pool(self) -> aioredis.ConnectionPool:
+        if self.sentinels:
+            sentinel = Sentinel(self.sentinels, sentinel_kwargs={"socket_timeout": self.pool_timeout})
+            return BlockingSentinelConnectionPool(
+                self.sentinel_master,
+                sentinel,
+                db=self.db,
+                max_connections=self.max_connections,
+                timeout=self.pool_timeout,
+                **self._pool_kwargs,
+            )
+        return aioredis.BlockingConnectionPool.from_url(
+            self.url, max_connections=self.max_connections, timeout=self.pool_timeout, **self._pool_kwargs
+        )
 
     async def connect(self):
         if not self._connection_pool:
-            self._connection_pool = aioredis.ConnectionPool.from_url(self.url, decode_responses=True)
+            self._connection_pool = self._create_pool()
             self.connection_pool = self._connection_pool
+            if self.tracked_prefixes:
+                self._tracking_task = asyncio.create_task(self._track_invalidations())
 
     async def disconnect(self):
+        if self._tracking_task:
+            self._tracking_task.cancel()
+            try:
+                await self._tracking_task
+            except asyncio.CancelledError:
+                pass
+            self._tracking_task = None
         if self._connection_pool:
             await self._connection_pool.disconnect()
             self._connection_pool = None
 
+    def key(self, namespace: str, tag, *parts) -> str:
+        """Имя ключа namespace:tag[:part...]. С hash_tags tag берётся в {}, чтобы все ключи одного
+        пользователя или токена попадали в один слот Redis Cluster."""
+        tag = f"{{{tag}}}" if self.hash_tags else str(tag)
+        return ":".join((namespace, tag, *map(str, parts)))
+
+    async def execute_command(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            self.latency.observe(str(args[0]).upper(), time.perf_counter() - started)
+
+    def pipeline(self, transaction: bool = True, shard_hint: str | None = None) -> Pipeline:
+        return TimedPipeline(self.latency, self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+    async def cached_get(self, key: str) -> str | None:
+        """GET, который для ключей из tracked_prefixes отвечает из памяти воркера."""
+        if not self._tracking or not key.startswith(self.tracked_prefixes):
+            return await self.get(key)
+        cached = self.client_cache.get(key)
+        if cached is not None:
+            return cached[0]
+        # Если за время запроса пришла любая инвалидация, прочитанное значение могло устареть
+        invalidations = self.invalidations
+        value = await self.get(key)
+        if self._tracking and invalidations == self.invalidations:
+            self.client_cache.set(key, (value,))
+        return value
+
+    def forget(self, key: str):
+        """Сбросить ключ из локального кэша сразу после собственной записи, не дожидаясь инвалидации."""
+        self.client_cache.pop(key)
+
+    async def _follow_invalidations(self):
+        pool = self.connection_pool
+        # Отдельное соединение вне пула: оно без таймаута чтения ждёт сообщений об инвалидации
+        connection = pool.connection_class(
+            **{**pool.connection_kwargs, "socket_timeout": None, "health_check_interval": 0}
+        )
+        prefixes = [arg for prefix in self.tracked_prefixes for arg in ("PREFIX", prefix)]
+        try:
+            await connection.connect()
+            await connection.send_command("CLIENT", "ID")
+            client_id = await connection.read_response()
+            await connection.send_command("CLIENT", "TRACKING", "ON", "REDIRECT", client_id, "BCAST", *prefixes)
+            await connection.read_response()
+            await connection.send_command("SUBSCRIBE", INVALIDATION_CHANNEL)
+            await connection.read_response()
+            self._tracking = True
+            while True:
+                kind, _, keys = await connection.read_response()
+                if kind != "message":
+                    continue
+                self.invalidations += 1
+                if keys is None:
+                    self.client_cache.clear()
+                else:
+                    for key in keys:
+                        self.client_cache.pop(key)
+        finally:
+            self._tracking = False
+            self.invalidations += 1
+            self.client_cache.clear()
+            await connection.disconnect()
+
+    async def _track_invalidations(self):
+        while True:
+            try:
+                await self._follow_invalidations()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Redis client-side cache disabled until reconnect: {e}")
+                await asyncio.sleep(1)
+
+    def stats(self) -> dict:
+        pool = self.connection_pool
+        in_use = len(pool._in_use_connections)
+        return {
+            "mode": "sentinel" if self.sentinels else "standalone",
+            "hash_tags": self.hash_tags,
+            "pool": {
+                "max_connections": pool.max_connections,
+                "in_use": in_use,
+                "idle": len(pool._available_connections),
+                "utilisation": round(in_use / pool.max_connections, 4),
+            },
+            "commands": self.latency.stats(),
+            "client_cache": {
+                "tracking": self._tracking,
+                "prefixes": list(self.tracked_prefixes),
+                "invalidations": self.invalidations,
+                **self.client_cache.stats(),
+            },
+        }
+
+
+def _parse_sentinels(value: str) -> list[tuple[str, int]]:
+    hosts = []
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        host, _, port = item.rpartition(":")
+        hosts.append((host, int(port)))
+    return hosts
+
 
-redis_for_auth = RedisService(settings.REDIS_URL)
+redis_for_auth = RedisService(
+    settings.REDIS_URL,
+    max_connections=settings.REDIS_MAX_CONNECTIONS,
+    pool_timeout=settings.REDIS_POOL_TIMEOUT_SECONDS,
+    sentinels=_parse_sentinels(settings.REDIS_SENTINELS),
+    sentinel_master=settings.REDIS_SENTINEL_MASTER,
+    db=settings.REDIS_DB,
+    hash_tags=settings.REDIS_HASH_TAGS,
+    tracked_prefixes=("token_gen:",),
+    client_cache_size=settings.REDIS_CLIENT_CACHE_SIZE if settings.REDIS_CLIENT_CACHE_ENABLED else 0,
+    client_cache_ttl=settings.REDIS_CLIENT_CACHE_TTL_SECONDS,
+    socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+    socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT_SECONDS,
+    socket_keepalive=True,
+    health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL_SECONDS,
+    retry=Retry(ExponentialBackoff(cap=1, base=0.05), settings.REDIS_RETRY_ATTEMPTS),
+    retry_on_error=[ConnectionError, TimeoutError],
+)
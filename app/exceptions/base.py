@@ -4,6 +4,7 @@ from fastapi import HTTPException, status
 class BaseHTTPException(HTTPException):
     status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
     detail = "Server Error"
+    headers: dict[str, str] | None = None
 
     def __init__(self):
-        super().__init__(status_code=self.status_code, detail=self.detail)
+        super().__init__(status_code=self.status_code, detail=self.detail, headers=self.headers)
@@ -0,0 +1,22 @@
+from fastapi import status
+
+from app.exceptions.base import BaseHTTPException
+
+
+class HashingOverloadedError(BaseHTTPException):
+    """Очередь на вычисление bcrypt переполнена."""
+
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    detail = "Сервис перегружен, повторите попытку позже"
+    headers = {"Retry-After": "1"}
+
+
+class TooManyRequestsError(BaseHTTPException):
+    """Превышен лимит попыток."""
+
+    status_code = status.HTTP_429_TOO_MANY_REQUESTS
+    detail = "Слишком много попыток, повторите позже"
+
+    def __init__(self, retry_after: int):
+        self.headers = {"Retry-After": str(retry_after)}
+        super().__init__()
@@ -1,2 +1,6 @@
 class UserAlreadyExistsError(Exception):
     """Пользователь с таким email уже существует."""
+
+
+class PhoneAlreadyExistsError(UserAlreadyExistsError):
+    """Пользователь с таким телефоном уже существует."""
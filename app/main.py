@@ -1,31 +1,64 @@
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from loguru import logger
 
+from app.api.metrics import router as metrics_router
 from app.api.routers import all_routers
+from app.config.main import settings
 from app.config.redis import redis_for_auth
-from app.exceptions.users import UserAlreadyExistsError
+from app.exceptions.users import PhoneAlreadyExistsError, UserAlreadyExistsError
+from app.services.user_import import import_hashing_pool
+from app.utils.hashing import password_hasher
+from app.utils.metrics import MetricsMiddleware, metrics
+from app.utils.profiling import ProfilingMiddleware, profiled
+from app.utils.pubsub import pubsub_listener
+from app.utils.revocation import revocation_list
 
 
 @asynccontextmanager
 async def lifespan(client: FastAPI):
     try:
         await redis_for_auth.connect()
+        await pubsub_listener.start()
+        await revocation_list.start()
+        password_hasher.start()
+        import_hashing_pool.start()
         yield
     except Exception as e:
         logger.exception(f"{e}")
     finally:
+        await password_hasher.shutdown()
+        await import_hashing_pool.shutdown()
+        await revocation_list.stop()
+        await pubsub_listener.stop()
         await redis_for_auth.disconnect()
 
 
-app = FastAPI(lifespan=lifespan)
+response_class = ORJSONResponse if settings.FAST_JSON_ENABLED else JSONResponse
+if settings.PROFILING_ENABLED:
+    response_class = profiled(response_class)
+
+app = FastAPI(lifespan=lifespan, default_response_class=response_class)
 
 
 for router in all_routers:
     app.include_router(router)
 
+if settings.PROFILING_ENABLED:
+    app.add_middleware(
+        ProfilingMiddleware,
+        header=settings.PROFILING_HEADER,
+        sample_rate=settings.PROFILING_SAMPLE_RATE,
+        output_dir=settings.PROFILING_DIR,
+        interval=settings.PROFILING_INTERVAL_SECONDS,
+    )
+
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, metrics=metrics)
+    app.include_router(metrics_router)
+
 
 @app.get("/health", include_in_schema=False)
 def health_check() -> dict:
@@ -39,3 +72,11 @@ async def user_already_exists_exception_handler(request, exc: UserAlreadyExistsE
         status_code=status.HTTP_409_CONFLICT,
         content={"detail": "Пользователь уже существует"},
     )
+
+
+@app.exception_handler(PhoneAlreadyExistsError)
+async def phone_already_exists_exception_handler(request, exc: PhoneAlreadyExistsError):
+    return JSONResponse(
+        status_code=status.HTTP_409_CONFLICT,
+        content={"detail": "Пользователь с таким телефоном уже существует"},
+    )
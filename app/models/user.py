@@ -1,6 +1,6 @@
 import uuid
 
-from sqlalchemy import Boolean, String, text
+from sqlalchemy import Boolean, Index, Integer, String, func, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -21,3 +21,17 @@ class User(Base):
     is_active: Mapped[bool] = mapped_column(Boolean, default=False, server_default=text("false"), nullable=False)
     is_user: Mapped[bool] = mapped_column(Boolean, default=True, server_default=text("true"), nullable=False)
     is_admin: Mapped[bool] = mapped_column(Boolean, default=False, server_default=text("false"), nullable=False)
+    # Версия строки для ETag. Увеличивается в SQLAlchemyRepository.update, UPDATE проверяет прежнее значение
+    version: Mapped[int] = mapped_column(Integer, default=1, server_default=text("1"), nullable=False)
+
+    __mapper_args__ = {"version_id_col": version, "version_id_generator": False}
+
+
+# Вход по email без учёта регистра. INCLUDE покрывает колонки, которые читает вход, - index-only scan.
+# email тоже в INCLUDE: без исходной колонки Postgres не делает index-only scan по индексу на выражении
+Index(
+    "ix_users_email_lower",
+    func.lower(User.email),
+    unique=True,
+    postgresql_include=["email", "id", "password", "is_active", "is_user", "is_admin"],
+)
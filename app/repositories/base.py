@@ -1,18 +1,45 @@
 import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
 
 from loguru import logger
-from sqlalchemy import select
+from sqlalchemy import Row, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.abstractions.base_repository import AbstractRepository
-from app.config.database import async_session
+from app.config.database import async_replica_session, async_session
 from app.exceptions.base import BaseHTTPException
+from app.repositories.unit_of_work import SQLAlchemyUnitOfWork
 
 
 class SQLAlchemyRepository(AbstractRepository):
+    """Репозиторий работает в сессиях переданной единицы работы, изменения только сбрасываются в БД (flush),
+    фиксирует их владелец единицы работы. Без единицы работы каждый вызов использует свою сессию и коммит.
+    Чтения (get_all, find_one_or_none, find_row, find_rows) направляются в реплику, запись - в основную БД."""
+
     model = None
 
+    def __init__(self, uow: SQLAlchemyUnitOfWork | None = None):
+        self.uow = uow
+
+    @asynccontextmanager
+    async def _session(self, write: bool = False) -> AsyncIterator[AsyncSession]:
+        """Сессия для записи - в основную БД, для чтения - в реплику, если она настроена."""
+        if self.uow:
+            yield self.uow.session if write else self.uow.read_session
+        else:
+            async with (async_session if write else async_replica_session)() as session:
+                yield session
+
+    async def _save(self, session: AsyncSession):
+        if self.uow:
+            await session.flush()
+        else:
+            await session.commit()
+
     async def get_all(self):
-        async with async_session() as session:
+        async with self._session() as session:
             try:
                 query = select(self.model)
                 result = await session.execute(query)
@@ -21,21 +48,95 @@ class SQLAlchemyRepository(AbstractRepository):
                 logger.error(f"Error: {str(e)}")
                 raise BaseHTTPException
 
+    async def get_page(self, columns: list, limit: int, after=None, **filter_by):
+        """Keyset-страница, упорядоченная по первичному ключу. Возвращает строки выбранных колонок, а не ORM-объекты."""
+        async with self._session() as session:
+            try:
+                query = select(*columns).filter_by(**filter_by).order_by(self.model.id).limit(limit)
+                if after is not None:
+                    query = query.where(self.model.id > after)
+                result = await session.execute(query)
+                return result.all()
+            except Exception as e:
+                logger.error(f"Error: {str(e)}")
+                raise BaseHTTPException
+
+    async def stream(self, columns: list, batch_size: int = 1000, **filter_by) -> AsyncIterator[Row]:
+        """Построчное чтение через серверный курсор в отдельной сессии: в памяти не больше batch_size строк.
+        Сессия живёт, пока читается генератор, поэтому единица работы запроса не используется."""
+        async with async_replica_session() as session:
+            query = select(*columns).filter_by(**filter_by).execution_options(yield_per=batch_size)
+            result = await session.stream(query)
+            async for partition in result.partitions():
+                for row in partition:
+                    yield row
+
     async def create(self, entity_data: dict):
-        async with async_session() as session:
+        async with self._session(write=True) as session:
             try:
                 entity = self.model(**entity_data)
                 session.add(entity)
-                await session.commit()
-                await session.refresh(entity)
+                await self._save(session)
                 return entity
             except Exception as e:
                 await session.rollback()
                 logger.error(f"Error: {str(e)}")
                 raise BaseHTTPException
 
+    async def create_or_none(self, entity_data: dict):
+        """INSERT ... ON CONFLICT DO NOTHING RETURNING: созданная сущность за один запрос или None при конфликте."""
+        async with self._session(write=True) as session:
+            try:
+                query = insert(self.model).values(**entity_data).on_conflict_do_nothing().returning(self.model)
+                entity = await session.scalar(query)
+                await self._save(session)
+                return entity
+            except Exception as e:
+                await session.rollback()
+                logger.error(f"Error: {str(e)}")
+                raise BaseHTTPException
+
+    async def insert_many(self, entities_data: list[dict], returning: list):
+        """Многострочный INSERT ... ON CONFLICT DO NOTHING RETURNING: конфликтующие строки пропускаются."""
+        if not entities_data:
+            return []
+        async with self._session(write=True) as session:
+            try:
+                query = insert(self.model).values(entities_data).on_conflict_do_nothing().returning(*returning)
+                result = await session.execute(query)
+                inserted = result.all()
+                await self._save(session)
+                return inserted
+            except Exception as e:
+                await session.rollback()
+                logger.error(f"Error: {str(e)}")
+                raise BaseHTTPException
+
+    async def find_row(self, columns: list, *conditions, **filter_by) -> Row | None:
+        """Одна строка только выбранных колонок вместо ORM-объекта. conditions - выражения SQLAlchemy
+        для условий, которые не записываются через filter_by (например, по функции от колонки)."""
+        async with self._session() as session:
+            try:
+                query = select(*columns).where(*conditions).filter_by(**filter_by)
+                result = await session.execute(query)
+                return result.one_or_none()
+            except Exception as e:
+                logger.error(f"Error: {str(e)}")
+                raise BaseHTTPException
+
+    async def find_rows(self, columns: list, *conditions, **filter_by) -> list[Row]:
+        """Все строки выбранных колонок, подходящие под условия, без ORM-объектов."""
+        async with self._session() as session:
+            try:
+                query = select(*columns).where(*conditions).filter_by(**filter_by)
+                result = await session.execute(query)
+                return result.all()
+            except Exception as e:
+                logger.error(f"Error: {str(e)}")
+                raise BaseHTTPException
+
     async def find_one_or_none(self, **filter_by):
-        async with async_session() as session:
+        async with self._session() as session:
             try:
                 query = select(self.model).filter_by(**filter_by)
                 result = await session.execute(query)
@@ -45,13 +146,19 @@ class SQLAlchemyRepository(AbstractRepository):
                 raise BaseHTTPException
 
     async def update(self, entity: model, updates: dict) -> model:
-        """Обновить сущность."""
-        async with async_session() as session:
+        """Обновить сущность и увеличить её версию, если она есть у модели.
+        В единице работы изменения попадут в БД при её коммите."""
+        async with self._session(write=True) as session:
             try:
+                if self.uow and entity not in session:
+                    entity = await session.merge(entity)
                 for key, value in updates.items():
                     setattr(entity, key, value)
-                session.add(entity)
-                await session.commit()
+                if updates and hasattr(self.model, "version"):
+                    entity.version += 1
+                if not self.uow:
+                    session.add(entity)
+                    await session.commit()
                 return entity
             except Exception as e:
                 logger.error(f"Error: {str(e)}")
@@ -0,0 +1,76 @@
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.abstractions.unit_of_work import AbstractUnitOfWork
+from app.config.database import async_replica_session, async_session
+
+
+class SQLAlchemyUnitOfWork(AbstractUnitOfWork):
+    """Одна сессия и одна транзакция на запрос. Сессии открываются при первом обращении.
+
+    Чтение идёт в реплику, пока в единице работы не было записи (или явного route_to_primary),
+    после этого и чтение, и запись идут в основную БД - запрос видит свои изменения.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker = async_session,
+        replica_session_factory: async_sessionmaker = async_replica_session,
+    ):
+        self._session_factory = session_factory
+        self._replica_session_factory = replica_session_factory
+        self._session: AsyncSession | None = None
+        self._replica_session: AsyncSession | None = None
+        self._primary_only = replica_session_factory is session_factory
+        self._writing = False
+
+    def _primary(self) -> AsyncSession:
+        if self._session is None:
+            self._session = self._session_factory()
+        return self._session
+
+    @property
+    def session(self) -> AsyncSession:
+        """Сессия основной БД для записи."""
+        self._primary_only = True
+        self._writing = True
+        return self._primary()
+
+    @property
+    def read_session(self) -> AsyncSession:
+        if self._primary_only:
+            return self._primary()
+        if self._replica_session is None:
+            self._replica_session = self._replica_session_factory()
+        return self._replica_session
+
+    def route_to_primary(self):
+        """Дальнейшие чтения выполнять в основной БД, например перед изменением прочитанных данных."""
+        self._primary_only = True
+
+    async def commit(self):
+        if self._session is not None:
+            await self._session.commit()
+        self._writing = False
+
+    async def rollback(self):
+        for session in (self._session, self._replica_session):
+            if session is not None:
+                await session.rollback()
+        self._writing = False
+
+    async def release_reads(self):
+        """Закрыть сессии, в которых было только чтение, чтобы соединение не ждало в открытой транзакции,
+        пока запрос считает bcrypt или ходит в Redis. Прочитанные объекты остаются доступны
+        (expire_on_commit=False), при следующем обращении сессия откроется заново."""
+        if self._replica_session is not None:
+            await self._replica_session.close()
+            self._replica_session = None
+        if self._session is not None and not self._writing:
+            await self._session.close()
+            self._session = None
+
+    async def close(self):
+        for session in (self._session, self._replica_session):
+            if session is not None:
+                await session.close()
+        self._session = self._replica_session = None
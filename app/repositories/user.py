@@ -1,6 +1,25 @@
+from sqlalchemy import Row, func, or_
+
 from app.models.user import User
 from app.repositories.base import SQLAlchemyRepository
 
 
 class UsersRepo(SQLAlchemyRepository):
     model = User
+
+    async def find_by_email(self, columns: list, email: str) -> Row | None:
+        """Поиск по email без учёта регистра. Условие совпадает с выражением индекса ix_users_email_lower,
+        поэтому колонки из его INCLUDE читаются без обращения к таблице."""
+        return await self.find_row(columns, func.lower(User.email) == func.lower(email))
+
+    async def find_taken_contacts(self, emails: list[str], phones: list[str]) -> list[Row]:
+        """Уже занятые email и телефоны одним запросом. Email сравниваются и возвращаются в нижнем регистре,
+        как их проверяет уникальный индекс ix_users_email_lower."""
+        conditions = []
+        if emails:
+            conditions.append(func.lower(User.email).in_([email.lower() for email in emails]))
+        if phones:
+            conditions.append(User.phone.in_(phones))
+        if not conditions:
+            return []
+        return await self.find_rows([func.lower(User.email).label("email"), User.phone], or_(*conditions))
@@ -1,7 +1,9 @@
 import re
 import uuid
 
-from pydantic import BaseModel, EmailStr, Field, field_validator
+from pydantic import BaseModel, EmailStr, Field, field_validator, model_validator
+
+BCRYPT_HASH_RE = re.compile(r"^\$2[aby]\$\d{2}\$[./A-Za-z0-9]{53}$")
 
 
 class SUserRegister(BaseModel):
@@ -31,6 +33,22 @@ class SUserRegister(BaseModel):
     }
 
 
+class SUserImport(SUserRegister):
+    """Пользователь из файла импорта: пароль в открытом виде или готовый bcrypt-хеш."""
+
+    password: str | None = None
+    password_hash: str | None = None
+
+    @model_validator(mode="after")
+    def check_password(self):
+        if self.password_hash:
+            if not BCRYPT_HASH_RE.match(self.password_hash):
+                raise ValueError("password_hash должен быть bcrypt-хешем")
+        elif not self.password:
+            raise ValueError("Нужно указать password или password_hash")
+        return self
+
+
 class SUserAuth(BaseModel):
     email: EmailStr
     password: str
@@ -73,6 +91,22 @@ class SUserMe(BaseModel):
     }
 
 
+class SUserPublic(BaseModel):
+    id: uuid.UUID
+    email: EmailStr
+    phone: str
+    first_name: str
+    last_name: str
+    is_user: bool
+    is_active: bool
+    is_admin: bool
+
+
+class SUsersPage(BaseModel):
+    items: list[SUserPublic]
+    next_cursor: str | None = Field(None, description="Передайте в cursor, чтобы получить следующую страницу")
+
+
 class SLoginAnswer(BaseModel):
     access_token: str
     refresh_token: str
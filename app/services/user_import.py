@@ -0,0 +1,202 @@
+import asyncio
+import csv
+import json
+import multiprocessing
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import IO, Iterable, Iterator
+
+from fastapi import Depends
+from pydantic import ValidationError
+
+from app.config.main import settings
+from app.models.user import User
+from app.repositories.unit_of_work import SQLAlchemyUnitOfWork
+from app.repositories.user import UsersRepo
+from app.schemas.user import SUserImport
+from app.utils.dependencies import get_unit_of_work
+from app.utils.hashing import hash_password_sync
+
+
+def hash_passwords(passwords: list[str]) -> list[str]:
+    """Выполняется в отдельном процессе: bcrypt для пачки паролей."""
+    return [hash_password_sync(password) for password in passwords]
+
+
+def _read_csv(stream: IO[bytes]) -> Iterator[dict | ValueError]:
+    undecodable: list[UnicodeDecodeError] = []
+
+    def lines() -> Iterator[str]:
+        # Строка не в UTF-8 не прерывает чтение: запись из неё отдаётся как ошибка
+        for line in stream:
+            try:
+                yield line.decode("utf-8")
+            except UnicodeDecodeError as e:
+                undecodable.append(e)
+                yield line.decode("utf-8", errors="replace")
+
+    records = csv.DictReader(lines())
+    while True:
+        try:
+            record = next(records)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            yield ValueError(f"ошибка CSV: {e}")
+            continue
+        if undecodable:
+            yield ValueError(f"строка не в кодировке UTF-8: {undecodable[-1].reason}")
+            undecodable.clear()
+            continue
+        yield {key: value for key, value in record.items() if value not in ("", None)}
+
+
+def read_records(stream: IO[bytes], import_format: str) -> Iterator[dict | ValueError]:
+    """Построчно читать CSV с заголовком или NDJSON. Нераспознанная строка (в том числе не в UTF-8
+    или с ошибкой CSV) отдаётся как ошибка и попадает в отчёт, чтение файла продолжается."""
+    if import_format == "csv":
+        yield from _read_csv(stream)
+        return
+    for line in stream:
+        try:
+            text = line.decode("utf-8")
+        except UnicodeDecodeError as e:
+            yield ValueError(f"строка не в кодировке UTF-8: {e.reason}")
+            continue
+        if not text.strip():
+            continue
+        try:
+            yield json.loads(text)
+        except ValueError as e:
+            yield e
+
+
+def _next_batch(numbered: Iterator[tuple[int, dict | ValueError]], size: int) -> list:
+    return list(islice(numbered, size))
+
+
+class ImportHashingPool:
+    """Пул процессов bcrypt для импорта, один на воркер приложения. Процессы запускаются через spawn:
+    fork копировал бы цикл событий воркера и его открытые соединения с БД и Redis."""
+
+    def __init__(self, processes: int):
+        self.processes = processes
+        self._executor: ProcessPoolExecutor | None = None
+
+    def start(self):
+        if not self._executor:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.processes, mp_context=multiprocessing.get_context("spawn")
+            )
+
+    async def shutdown(self):
+        if self._executor:
+            executor, self._executor = self._executor, None
+            await asyncio.to_thread(executor.shutdown, wait=True)
+
+    async def hash(self, passwords: list[str]) -> list[str]:
+        """Захешировать пароли, разделив их поровну между процессами."""
+        if not passwords:
+            return []
+        self.start()
+        loop = asyncio.get_running_loop()
+        size = -(-len(passwords) // self.processes)
+        chunks = [passwords[i : i + size] for i in range(0, len(passwords), size)]
+        results = await asyncio.gather(
+            *(loop.run_in_executor(self._executor, hash_passwords, chunk) for chunk in chunks)
+        )
+        return [hashed for chunk in results for hashed in chunk]
+
+
+import_hashing_pool = ImportHashingPool(settings.IMPORT_HASHING_PROCESSES or os.cpu_count() or 1)
+
+
+class UserImportService:
+    """Массовый импорт пользователей пачками: проверка, поиск дубликатов одним запросом на пачку,
+    bcrypt в пуле процессов и вставка одним многострочным INSERT ... ON CONFLICT DO NOTHING."""
+
+    def __init__(self, uow: SQLAlchemyUnitOfWork = Depends(get_unit_of_work)):
+        self.uow = uow
+        self.uow.route_to_primary()
+        self.users_repo = UsersRepo(uow)
+        self.report = {"total": 0, "created": 0, "failed": 0, "errors": []}
+        self._seen_emails: set[str] = set()
+        self._seen_phones: set[str] = set()
+
+    async def run(self, records: Iterable[dict | ValueError], activate: bool = True) -> dict:
+        """Импортировать записи. Каждая пачка фиксируется отдельно, отчёт содержит ошибки по номерам строк.
+        Записи читаются и разбираются в потоке, чтобы чтение загруженного файла не блокировало цикл событий."""
+        numbered = enumerate(records, start=1)
+        while batch := await asyncio.to_thread(_next_batch, numbered, settings.IMPORT_BATCH_SIZE):
+            await self._import_batch(batch, activate)
+        return self.report
+
+    def _fail(self, row_number: int, error: str):
+        self.report["failed"] += 1
+        if len(self.report["errors"]) < settings.IMPORT_MAX_REPORTED_ERRORS:
+            self.report["errors"].append({"row": row_number, "error": error})
+
+    def _validate(self, batch: list[tuple[int, dict | ValueError]]) -> list[tuple[int, SUserImport]]:
+        valid = []
+        for row_number, record in batch:
+            self.report["total"] += 1
+            if isinstance(record, ValueError):
+                self._fail(row_number, f"Некорректная строка: {record}")
+                continue
+            try:
+                user = SUserImport.model_validate(record)
+            except ValidationError as e:
+                self._fail(row_number, "; ".join(error["msg"] for error in e.errors()))
+                continue
+            if user.email.lower() in self._seen_emails or user.phone in self._seen_phones:
+                self._fail(row_number, "Повтор email или телефона в файле")
+                continue
+            self._seen_emails.add(user.email.lower())
+            self._seen_phones.add(user.phone)
+            valid.append((row_number, user))
+        return valid
+
+    async def _import_batch(self, batch: list[tuple[int, dict | ValueError]], activate: bool):
+        valid = self._validate(batch)
+        if not valid:
+            return
+
+        existing = await self.users_repo.find_taken_contacts(
+            [user.email for _, user in valid], [user.phone for _, user in valid]
+        )
+        taken_emails = {row.email for row in existing}
+        taken_phones = {row.phone for row in existing}
+        fresh = []
+        for row_number, user in valid:
+            if user.email.lower() in taken_emails:
+                self._fail(row_number, "Пользователь с таким email уже существует")
+            elif user.phone in taken_phones:
+                self._fail(row_number, "Пользователь с таким телефоном уже существует")
+            else:
+                fresh.append((row_number, user))
+
+        hashes = iter(await import_hashing_pool.hash([user.password for _, user in fresh if not user.password_hash]))
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "email": user.email,
+                "phone": user.phone,
+                "first_name": user.first_name,
+                "last_name": user.last_name,
+                "password": user.password_hash or next(hashes),
+                "is_active": activate,
+                "is_user": True,
+                "is_admin": False,
+            }
+            for _, user in fresh
+        ]
+        inserted = await self.users_repo.insert_many(rows, returning=[User.email])
+        await self.uow.commit()
+
+        inserted_emails = {row.email for row in inserted}
+        self.report["created"] += len(inserted_emails)
+        for row_number, user in fresh:
+            if user.email not in inserted_emails:
+                self._fail(row_number, "Конфликт при вставке: пользователь уже существует")
@@ -1,14 +1,27 @@
 import uuid
+from typing import AsyncIterator
 
-from fastapi import BackgroundTasks, HTTPException, Response, status
+from fastapi import BackgroundTasks, Depends, HTTPException, Response, status
 from fastapi.responses import RedirectResponse
+from sqlalchemy.orm.exc import StaleDataError
 
 from app.config.main import settings
 from app.config.redis import redis_for_auth
-from app.exceptions.users import UserAlreadyExistsError
+from app.exceptions.users import PhoneAlreadyExistsError, UserAlreadyExistsError
+from app.models.user import User
+from app.repositories.unit_of_work import SQLAlchemyUnitOfWork
 from app.repositories.user import UsersRepo
-from app.schemas.user import SUserAuth, SUserRegister, SUserUpdate
+from app.schemas.user import SUserAuth, SUserPublic, SUserRegister, SUserUpdate
+from app.utils.claims import PRIVILEGE_FIELDS, build_claims, token_generations
+from app.utils.dependencies import get_unit_of_work
 from app.utils.email import send_email
+from app.utils.export import encode_rows
+from app.utils.outbox import email_outbox
+from app.utils.pagination import decode_cursor, encode_cursor
+from app.utils.principal_cache import principal_cache
+from app.utils.rate_limit import rate_limiter
+from app.utils.refresh_tokens import refresh_store
+from app.utils.revocation import revocation_list
 from app.utils.security import (
     create_access_token,
     create_refresh_token,
@@ -17,94 +30,170 @@ from app.utils.security import (
     verify_password,
 )
 
+PUBLIC_USER_COLUMNS = [getattr(User, field) for field in SUserPublic.model_fields]
+# Вход читает только эти колонки, все они есть в индексе ix_users_email_lower
+LOGIN_COLUMNS = [User.id, User.password, User.is_active]
+STATELESS_LOGIN_COLUMNS = [*LOGIN_COLUMNS, User.is_user, User.is_admin]
+
 
 class UserService:
-    def __init__(self):
-        self.users_repo = UsersRepo()
+    def __init__(self, uow: SQLAlchemyUnitOfWork = Depends(get_unit_of_work)):
+        self.uow = uow
+        self.users_repo = UsersRepo(uow)
         self.redis = redis_for_auth
 
-    async def register(self, user_data: SUserRegister, background_tasks: BackgroundTasks):
-        """Регистрация пользователя в системе. Создаётся запись в БД."""
-        existing = await self.users_repo.find_one_or_none(email=user_data.email)
-        if existing:
-            raise UserAlreadyExistsError
+    async def _access_claims(self, user) -> dict:
+        """Claims access-токена: только sub или полный набор для stateless-режима."""
+        if not settings.STATELESS_AUTH:
+            return {"sub": str(user.id)}
+        return build_claims(user, await token_generations.get(user.id))
+
+    async def _refresh_access_claims(self, user_id: str) -> dict:
+        if not settings.STATELESS_AUTH:
+            return {"sub": user_id}
+        user = await principal_cache.get_or_load(user_id, lambda: self.users_repo.find_one_or_none(id=user_id))
+        await self.uow.release_reads()
+        if not user or not user.is_active:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Пользователь не найден")
+        return await self._access_claims(user)
 
+    async def register(self, user_data: SUserRegister, background_tasks: BackgroundTasks, client_ip: str):
+        """Регистрация пользователя в системе. Создаётся запись в БД."""
+        await rate_limiter.check_register(client_ip)
+        self.uow.route_to_primary()
         data = user_data.model_dump()
-        data["password"] = get_password_hash(user_data.password)
-        user = await self.users_repo.create(entity_data=data)
-        confirm_token = str(uuid.uuid4())
-        await self.redis.setex(f"confirm:{confirm_token}", settings.CONFIRM_TOKEN_EXPIRE_SECONDS, str(user.id))
+        data["password"] = await get_password_hash(user_data.password)
+        user = await self.users_repo.create_or_none(entity_data=data)
+        if not user:
+            await self._raise_conflict(user_data)
+        await self.uow.commit()
 
+        confirm_token = str(uuid.uuid4())
         confirm_url = f"{settings.DOMAIN}/auth/confirm?token={confirm_token}"
+        email_subject = "Подтверждение регистрации"
         email_body = f"""
                 <h3>Здравствуйте, {user.first_name}!</h3>
                 <p>Для подтверждения регистрации перейдите по ссылке:</p>
                 <a href="{confirm_url}">Подтвердить email</a>
                 """
-        background_tasks.add_task(send_email, user.email, "Подтверждение регистрации", email_body)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.setex(self.redis.key("confirm", confirm_token), settings.CONFIRM_TOKEN_EXPIRE_SECONDS, str(user.id))
+            if settings.EMAIL_OUTBOX_ENABLED:
+                email_outbox.enqueue(pipe, user.email, email_subject, email_body)
+            await pipe.execute()
+        if not settings.EMAIL_OUTBOX_ENABLED:
+            background_tasks.add_task(send_email, user.email, email_subject, email_body)
 
         return {
             "message": f"{data['first_name']} {data['last_name']}, письмо с подтверждением отправлено на вашу почту"
         }
 
-    async def authenticate_user(self, user_data: SUserAuth, response: Response):
+    async def _raise_conflict(self, user_data: SUserRegister):
+        """Определить, какое уникальное поле заняло вставку, и поднять соответствующую ошибку."""
+        if await self.users_repo.find_by_email([User.id], user_data.email):
+            raise UserAlreadyExistsError
+        raise PhoneAlreadyExistsError
+
+    async def authenticate_user(self, user_data: SUserAuth, response: Response, client_ip: str):
         """Аутентификация пользователя по email и password. В результате генерируется пара токенов access и refresh"""
-        user = await self.users_repo.find_one_or_none(email=user_data.email)
-        if not user or not verify_password(user_data.password, user.password):
+        await rate_limiter.check_login(client_ip, user_data.email)
+        columns = STATELESS_LOGIN_COLUMNS if settings.STATELESS_AUTH else LOGIN_COLUMNS
+        user = await self.users_repo.find_by_email(columns, user_data.email)
+        await self.uow.release_reads()
+        if not user or not await verify_password(user_data.password, user.password):
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Неверная почта или пароль")
         if not user.is_active:
             raise HTTPException(status_code=403, detail="Email не подтвержден")
-        access_token = await create_access_token({"sub": str(user.id)})
-        refresh_token = await create_refresh_token({"sub": str(user.id)})
-        await self.redis.setex(f"refresh:{user.id}", settings.REFRESH_TOKEN_EXPIRE_SECONDS, refresh_token)
+        family_id, rotation_id = await refresh_store.issue(user.id)
+        return await self._issue_tokens(await self._access_claims(user), family_id, rotation_id, response)
+
+    async def _issue_tokens(self, access_claims: dict, family_id: str, rotation_id: str, response: Response):
+        """Выпустить пару токенов, привязанных к семейству refresh-токенов устройства."""
+        session_claims = {"fam": family_id, "rid": rotation_id}
+        access_token = await create_access_token({**access_claims, **session_claims})
+        refresh_token = await create_refresh_token({"sub": access_claims["sub"], **session_claims})
         response.set_cookie(key=settings.ACCESS_TOKEN_NAME, value=access_token, httponly=True)
         return {"access_token": access_token, "refresh_token": refresh_token}
 
     async def refresh_tokens(self, expired_access_token: str, response: Response):
-        """Обновление пары токенов access и refresh"""
+        """Обновление пары токенов access и refresh с ротацией семейства устройства"""
         try:
             payload = await decode_token(expired_access_token, verify_exp=False)
-            user_id = payload.get("sub")
-            if not user_id:
+            user_id, family_id, rotation_id = payload.get("sub"), payload.get("fam"), payload.get("rid")
+            if not user_id or not family_id or not rotation_id:
                 raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Некорректный токен")
-            stored_refresh = await self.redis.get(f"refresh:{user_id}")
-            if not stored_refresh:
-                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh-токен не найден")
-            await decode_token(stored_refresh)
-            new_access = await create_access_token({"sub": user_id})
-            new_refresh = await create_refresh_token({"sub": user_id})
-            await self.redis.setex(f"refresh:{user_id}", settings.REFRESH_TOKEN_EXPIRE_SECONDS, new_refresh)
-            response.set_cookie(key=settings.ACCESS_TOKEN_NAME, value=new_access, httponly=True)
-            return {"access_token": new_access, "refresh_token": new_refresh}
+            new_rotation_id = await refresh_store.rotate(user_id, family_id, rotation_id)
+            access_claims = await self._refresh_access_claims(user_id)
+            return await self._issue_tokens(access_claims, family_id, new_rotation_id, response)
         except HTTPException:
             raise
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=f"Ошибка при обновлении токенов: {e}")
 
-    async def get_all_users(self):
-        users = await self.users_repo.get_all()
-        return users or None
+    async def get_users_page(self, limit: int, cursor: str | None = None, **filters) -> dict:
+        """Страница пользователей без пароля. Следующая страница запрашивается по next_cursor.
+        Версии строк остаются в элементах для ETag и отбрасываются схемой ответа."""
+        filters = {key: value for key, value in filters.items() if value is not None}
+        after = decode_cursor(cursor) if cursor else None
+        rows = await self.users_repo.get_page([*PUBLIC_USER_COLUMNS, User.version], limit + 1, after, **filters)
+        next_cursor = encode_cursor(rows[limit - 1].id) if len(rows) > limit else None
+        return {"items": [row._asdict() for row in rows[:limit]], "next_cursor": next_cursor}
+
+    def export_users(self, export_format: str, **filters) -> AsyncIterator[bytes]:
+        """Потоковая выгрузка пользователей без пароля в NDJSON или CSV."""
+        filters = {key: value for key, value in filters.items() if value is not None}
+        rows = self.users_repo.stream(PUBLIC_USER_COLUMNS, settings.EXPORT_BATCH_SIZE, **filters)
+        return encode_rows(export_format, rows, SUserPublic.model_fields)
 
     async def update_user(self, user_id: int, user_data: SUserUpdate):
+        self.uow.route_to_primary()
         user = await self.users_repo.find_one_or_none(id=user_id)
         if not user:
             raise HTTPException(status_code=404, detail="Пользователь не найден")
-        updates = user_data.model_dump(exclude_unset=True)
+        return await self._apply_updates(user, user_data.model_dump(exclude_unset=True))
+
+    async def _apply_updates(self, user, updates: dict):
+        """Обновить пользователя одним коммитом и сбросить его кэши."""
         updated_user = await self.users_repo.update(user, updates)
+        try:
+            await self.uow.commit()
+        except StaleDataError:
+            await self.uow.rollback()
+            raise HTTPException(status_code=409, detail="Пользователь изменён другим запросом, повторите попытку")
+        await principal_cache.invalidate(user.id, fresh=updated_user)
+        if PRIVILEGE_FIELDS & updates.keys():
+            await token_generations.bump(user.id)
         return updated_user
 
     async def confirm_email(self, token: str) -> RedirectResponse:
-        user_id = await self.redis.get(f"confirm:{token}")
+        user_id = await self.redis.get(self.redis.key("confirm", token))
         if not user_id:
             raise HTTPException(status_code=400, detail="Неверный или просроченный токен")
+        self.uow.route_to_primary()
         user = await self.users_repo.find_one_or_none(id=user_id)
         if not user:
             raise HTTPException(status_code=404, detail="Пользователь не найден")
-        await self.update_user(user.id, SUserUpdate(is_active=True))
-        await self.redis.delete(f"confirm:{token}")
+        await self._apply_updates(user, {"is_active": True})
+        await self.redis.delete(self.redis.key("confirm", token))
         return RedirectResponse(url=f"{settings.DOMAIN}/{settings.REDIRECT_URL}", status_code=302)
 
-    async def logout(self, user_id: uuid.UUID, response: Response):
-        await self.redis.delete(f"refresh:{user_id}")
+    async def logout(self, user_id: uuid.UUID, access_token: str, response: Response):
+        """Выход на текущем устройстве: отзываются access-токен и семейство refresh-токенов этого входа."""
+        payload = await decode_token(access_token)
+        if payload.get("fam"):
+            await refresh_store.revoke(user_id, payload["fam"])
+        if payload.get("jti"):
+            await revocation_list.revoke(payload["jti"], payload["exp"])
+        await token_generations.bump(user_id)
         response.delete_cookie(key=settings.ACCESS_TOKEN_NAME)
         return {"message": "Вы вышли из системы"}
+
+    async def logout_all(self, user_id: uuid.UUID, access_token: str, response: Response):
+        """Выход на всех устройствах одной операцией независимо от их числа."""
+        payload = await decode_token(access_token)
+        if payload.get("jti"):
+            await revocation_list.revoke(payload["jti"], payload["exp"])
+        await refresh_store.revoke_all(user_id)
+        await token_generations.bump(user_id)
+        response.delete_cookie(key=settings.ACCESS_TOKEN_NAME)
+        return {"message": "Вы вышли из системы на всех устройствах"}
@@ -0,0 +1,57 @@
+import uuid
+from dataclasses import dataclass
+
+from app.config.redis import RedisService, redis_for_auth
+from app.models.user import User
+
+CLAIMS_VERSION = 1
+PRIVILEGE_FIELDS = frozenset({"is_active", "is_user", "is_admin"})
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """Пользователь, восстановленный из claims access-токена без обращения к БД."""
+
+    id: uuid.UUID
+    is_active: bool
+    is_user: bool
+    is_admin: bool
+
+
+def build_claims(user: User, generation: int) -> dict:
+    """Компактный набор claims для stateless-режима."""
+    roles = [role for role, granted in (("user", user.is_user), ("admin", user.is_admin)) if granted]
+    return {"sub": str(user.id), "cv": CLAIMS_VERSION, "rol": roles, "act": user.is_active, "gen": generation}
+
+
+def principal_from_claims(payload: dict) -> Principal:
+    roles = payload.get("rol", [])
+    return Principal(
+        id=uuid.UUID(payload["sub"]),
+        is_active=bool(payload.get("act")),
+        is_user="user" in roles,
+        is_admin="admin" in roles,
+    )
+
+
+class TokenGenerations:
+    """Счётчик поколений токенов пользователя. Увеличение счётчика отзывает все выданные access-токены."""
+
+    def __init__(self, redis: RedisService):
+        self.redis = redis
+
+    def _key(self, user_id) -> str:
+        return self.redis.key("token_gen", user_id)
+
+    async def get(self, user_id) -> int:
+        value = await self.redis.cached_get(self._key(user_id))
+        return int(value) if value else 0
+
+    async def bump(self, user_id) -> int:
+        key = self._key(user_id)
+        generation = await self.redis.incr(key)
+        self.redis.forget(key)
+        return generation
+
+
+token_generations = TokenGenerations(redis_for_auth)
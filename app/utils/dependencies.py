@@ -3,24 +3,76 @@ from fastapi.security import APIKeyCookie
 
 from app.config.main import settings
 from app.models.user import User
+from app.repositories.unit_of_work import SQLAlchemyUnitOfWork
 from app.repositories.user import UsersRepo
+from app.utils.claims import CLAIMS_VERSION, Principal, principal_from_claims, token_generations
+from app.utils.principal_cache import principal_cache
+from app.utils.revocation import revocation_list
 from app.utils.security import decode_token
 
 cookie_scheme = APIKeyCookie(name=settings.ACCESS_TOKEN_NAME, auto_error=True)
 
 
-async def get_current_user(token: str = Depends(cookie_scheme)):
+async def get_unit_of_work():
+    """Единица работы на время запроса: все репозитории запроса используют одну сессию."""
+    async with SQLAlchemyUnitOfWork() as uow:
+        yield uow
+
+
+async def _decode_access_token(token: str) -> dict:
     payload = await decode_token(token)
+    if await revocation_list.is_revoked(payload.get("jti")):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Токен отозван")
+    return payload
+
+
+def _is_stateless(payload: dict) -> bool:
+    """Токен выпущен в stateless-режиме и его можно авторизовать по claims."""
+    return settings.STATELESS_AUTH and "cv" in payload
+
+
+async def _authorize_claims(payload: dict) -> Principal:
+    if payload["cv"] != CLAIMS_VERSION:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Токен устарел")
+    principal = principal_from_claims(payload)
+    if payload.get("gen") != await token_generations.get(principal.id):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Токен отозван")
+    if not principal.is_active:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Email не подтвержден")
+    return principal
+
+
+async def _load_user(payload: dict, uow: SQLAlchemyUnitOfWork) -> User:
     user_id = payload.get("sub")
     if not user_id:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Не найден ID пользователя")
-    user = await UsersRepo().find_one_or_none(id=user_id)
+    user = await principal_cache.get_or_load(user_id, lambda: UsersRepo(uow).find_one_or_none(id=user_id))
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Пользователь не найден")
     return user
 
 
-async def get_current_admin_user(current_user: User = Depends(get_current_user)):
+async def get_current_principal(
+    token: str = Depends(cookie_scheme), uow: SQLAlchemyUnitOfWork = Depends(get_unit_of_work)
+) -> Principal | User:
+    """Пользователь для проверки прав. В stateless-режиме берётся только из токена, без БД."""
+    payload = await _decode_access_token(token)
+    if _is_stateless(payload):
+        return await _authorize_claims(payload)
+    return await _load_user(payload, uow)
+
+
+async def get_current_user(
+    token: str = Depends(cookie_scheme), uow: SQLAlchemyUnitOfWork = Depends(get_unit_of_work)
+) -> User:
+    """Полный профиль пользователя. В stateless-режиме доступ проверяется по токену до загрузки профиля."""
+    payload = await _decode_access_token(token)
+    if _is_stateless(payload):
+        await _authorize_claims(payload)
+    return await _load_user(payload, uow)
+
+
+async def get_current_admin_user(current_user: Principal | User = Depends(get_current_principal)):
     if current_user.is_admin:
         return current_user
     raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Недостаточно прав!")
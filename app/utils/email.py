@@ -1,21 +1,105 @@
+import asyncio
+from contextlib import asynccontextmanager
 from email.mime.text import MIMEText
+from typing import AsyncIterator
 
 import aiosmtplib
 
 from app.config.main import settings
+from app.utils.metrics import metrics
 
 
-async def send_email(to_email: str, subject: str, body: str):
+def build_message(to_email: str, subject: str, body: str) -> MIMEText:
     msg = MIMEText(body, "html")
     msg["From"] = settings.SMTP_USER
     msg["To"] = to_email
     msg["Subject"] = subject
+    return msg
+
+
+async def send_email(to_email: str, subject: str, body: str):
+    try:
+        await aiosmtplib.send(
+            build_message(to_email, subject, body),
+            hostname=settings.SMTP_HOST,
+            port=settings.SMTP_PORT,
+            username=settings.SMTP_USER if settings.SMTP_PASSWORD else None,
+            password=settings.SMTP_PASSWORD or None,
+            start_tls=settings.SMTP_START_TLS,
+            timeout=settings.SMTP_TIMEOUT_SECONDS,
+        )
+    except Exception:
+        metrics.observe_email("background", "failed")
+        raise
+    metrics.observe_email("background", "sent")
+
+
+class _PooledConnection:
+    def __init__(self):
+        self.client: aiosmtplib.SMTP | None = None
+        self.sent = 0
+
+
+class SMTPPool:
+    """Небольшой пул постоянных авторизованных SMTP-соединений.
+
+    Соединение открывается при первом использовании, переиспользуется для многих писем
+    и переоткрывается после max_messages писем или ошибки.
+    """
+
+    def __init__(self, size: int, max_messages: int):
+        self.size = size
+        self.max_messages = max_messages
+        self._idle: asyncio.Queue[_PooledConnection] = asyncio.Queue()
+        self._connections = [_PooledConnection() for _ in range(size)]
+        for connection in self._connections:
+            self._idle.put_nowait(connection)
+        self.connects = 0
+
+    async def _open(self, connection: _PooledConnection):
+        await self._close(connection)
+        client = aiosmtplib.SMTP(
+            hostname=settings.SMTP_HOST,
+            port=settings.SMTP_PORT,
+            start_tls=settings.SMTP_START_TLS,
+            timeout=settings.SMTP_TIMEOUT_SECONDS,
+        )
+        await client.connect()
+        if settings.SMTP_PASSWORD:
+            await client.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
+        connection.client = client
+        connection.sent = 0
+        self.connects += 1
+
+    @staticmethod
+    async def _close(connection: _PooledConnection):
+        if connection.client is not None:
+            try:
+                await connection.client.quit()
+            except aiosmtplib.SMTPException:
+                connection.client.close()
+            connection.client = None
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[aiosmtplib.SMTP]:
+        connection = await self._idle.get()
+        try:
+            if connection.client is None or not connection.client.is_connected or connection.sent >= self.max_messages:
+                await self._open(connection)
+            yield connection.client
+            connection.sent += 1
+        except Exception:
+            if connection.client is not None:
+                connection.client.close()
+                connection.client = None
+            raise
+        finally:
+            self._idle.put_nowait(connection)
+
+    async def send(self, to_email: str, subject: str, body: str):
+        async with self.connection() as client:
+            await client.send_message(build_message(to_email, subject, body))
 
-    await aiosmtplib.send(
-        msg,
-        hostname=settings.SMTP_HOST,
-        port=settings.SMTP_PORT,
-        username=settings.SMTP_USER,
-        password=settings.SMTP_PASSWORD,
-        start_tls=True,
-    )
+    async def close(self):
+        for connection in self._connections:
+            await self._close(connection)
@@ -0,0 +1,39 @@
+import hashlib
+
+from fastapi import Request
+from fastapi.responses import Response
+
+# Клиент обязан перепроверять ответ при каждом использовании, но может сделать это условным запросом
+CACHE_CONTROL = "private, no-cache"
+
+
+def user_etag(user) -> str:
+    """Сильный ETag пользователя: версия строки растёт при каждом изменении через репозиторий."""
+    return f'"{user.id.hex}-{user.version}"'
+
+
+def page_etag(items: list[dict], next_cursor: str | None) -> str:
+    """ETag страницы: меняется при изменении состава страницы или версии любого пользователя на ней."""
+    digest = hashlib.sha256(str(next_cursor).encode())
+    for item in items:
+        digest.update(f"{item['id'].hex}-{item['version']};".encode())
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """If-None-Match совпадает с текущим ETag (слабое сравнение, как требует RFC 9110)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in {candidate.strip().removeprefix("W/") for candidate in header.split(",")}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+
+def set_etag(response: Response, etag: str):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
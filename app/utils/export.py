@@ -0,0 +1,45 @@
+import csv
+import io
+import json
+from typing import AsyncIterator, Iterable
+
+from sqlalchemy import Row
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+CHUNK_SIZE = 64 * 1024
+
+
+async def encode_ndjson(rows: AsyncIterator[Row], fields: Iterable[str]) -> AsyncIterator[bytes]:
+    fields = list(fields)
+    buffer = []
+    size = 0
+    async for row in rows:
+        line = json.dumps(dict(zip(fields, row)), default=str, ensure_ascii=False) + "\n"
+        buffer.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            yield "".join(buffer).encode()
+            buffer.clear()
+            size = 0
+    if buffer:
+        yield "".join(buffer).encode()
+
+
+async def encode_csv(rows: AsyncIterator[Row], fields: Iterable[str]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    async for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def encode_rows(export_format: str, rows: AsyncIterator[Row], fields: Iterable[str]) -> AsyncIterator[bytes]:
+    """Инкрементально кодировать строки в NDJSON или CSV кусками по ~64 КБ."""
+    encoder = encode_csv if export_format == "csv" else encode_ndjson
+    return encoder(rows, fields)
@@ -0,0 +1,119 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from loguru import logger
+from passlib.context import CryptContext
+
+from app.config.main import settings
+from app.exceptions.security import HashingOverloadedError
+from app.utils.metrics import metrics
+from app.utils.spans import record_span
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def hash_password_sync(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def verify_password_sync(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def _timed_call(func, *args):
+    """Выполняется в воркере пула: возвращает результат и моменты начала/окончания работы."""
+    started_at = time.monotonic()
+    result = func(*args)
+    return result, started_at, time.monotonic()
+
+
+class PasswordHasher:
+    """Асинхронный движок bcrypt: пул потоков или процессов с ограниченной очередью."""
+
+    def __init__(self, executor_type: str, max_workers: int, queue_size: int):
+        self.executor_type = executor_type
+        self.max_workers = max_workers
+        self.queue_size = queue_size
+        self._executor: Executor | None = None
+        self._pending = 0
+        self._max_queue_depth = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._execute_total = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self._pending - self.max_workers)
+
+    def start(self):
+        if self._executor:
+            return
+        if self.executor_type == "process":
+            # spawn, а не fork: процесс воркера уже держит цикл событий, потоки и соединения с БД и Redis
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bcrypt")
+        logger.info(f"Bcrypt pool started: {self.executor_type} x{self.max_workers}, queue {self.queue_size}")
+
+    async def shutdown(self):
+        if self._executor:
+            executor, self._executor = self._executor, None
+            await asyncio.to_thread(executor.shutdown, wait=True)
+
+    async def _submit(self, operation: str, func, *args):
+        if self._pending >= self.max_workers + self.queue_size:
+            self._rejected += 1
+            metrics.observe_hashing_rejected()
+            raise HashingOverloadedError
+        self.start()
+        self._pending += 1
+        self._max_queue_depth = max(self._max_queue_depth, self.queue_depth)
+        enqueued_at = time.monotonic()
+        try:
+            loop = asyncio.get_running_loop()
+            result, started_at, finished_at = await loop.run_in_executor(self._executor, _timed_call, func, *args)
+        finally:
+            self._pending -= 1
+        wait = started_at - enqueued_at
+        self._completed += 1
+        self._wait_total += wait
+        self._wait_max = max(self._wait_max, wait)
+        self._execute_total += finished_at - started_at
+        metrics.observe_hashing(operation, wait, finished_at - started_at)
+        record_span("hashing", f"{operation}, wait {wait * 1000:.1f} ms", time.monotonic() - enqueued_at)
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._submit("hash", hash_password_sync, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._submit("verify", verify_password_sync, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        completed = self._completed or 1
+        return {
+            "executor": self.executor_type,
+            "max_workers": self.max_workers,
+            "queue_size": self.queue_size,
+            "in_flight": self._pending,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self._max_queue_depth,
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "avg_wait_ms": round(self._wait_total / completed * 1000, 3),
+            "max_wait_ms": round(self._wait_max * 1000, 3),
+            "avg_execute_ms": round(self._execute_total / completed * 1000, 3),
+        }
+
+
+password_hasher = PasswordHasher(
+    executor_type=settings.HASHING_EXECUTOR,
+    max_workers=settings.HASHING_MAX_WORKERS,
+    queue_size=settings.HASHING_QUEUE_SIZE,
+)
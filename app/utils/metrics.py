@@ -0,0 +1,162 @@
+import os
+import time
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config.main import settings
+
+DB_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+REDIS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+HASHING_BUCKETS = (0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class Metrics:
+    """Метрики Prometheus по HTTP, БД, Redis, bcrypt и почте.
+
+    При выключенных метриках prometheus_client не импортируется, middleware и хуки SQLAlchemy не ставятся,
+    а методы observe_* сразу возвращаются. Под gunicorn метрики воркеров собираются из
+    PROMETHEUS_MULTIPROC_DIR (см. app/config/gunicorn.py).
+    """
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        if not enabled:
+            return
+        from prometheus_client import Counter, Gauge, Histogram
+
+        self.http_requests = Counter("http_requests_total", "HTTP requests", ["method", "route", "status"])
+        self.http_duration = Histogram("http_request_duration_seconds", "HTTP request latency", ["method", "route"])
+        self.http_in_progress = Gauge(
+            "http_requests_in_progress", "HTTP requests in flight", ["method"], multiprocess_mode="livesum"
+        )
+        self.db_query_duration = Histogram(
+            "db_query_duration_seconds", "SQL statement latency", ["engine"], buckets=DB_BUCKETS
+        )
+        self.db_pool_wait = Histogram(
+            "db_pool_wait_seconds", "Wait for a pooled DB connection", ["engine"], buckets=DB_BUCKETS
+        )
+        self.db_checkouts = Counter("db_pool_checkouts_total", "DB connection checkouts", ["engine"])
+        self.db_in_use = Gauge(
+            "db_pool_connections_in_use", "DB connections checked out", ["engine"], multiprocess_mode="livesum"
+        )
+        self.redis_duration = Histogram(
+            "redis_command_duration_seconds", "Redis command latency", ["command"], buckets=REDIS_BUCKETS
+        )
+        self.hashing_wait = Histogram(
+            "bcrypt_queue_wait_seconds", "Wait for a bcrypt worker", ["operation"], buckets=HASHING_BUCKETS
+        )
+        self.hashing_execute = Histogram(
+            "bcrypt_execute_seconds", "bcrypt execution time", ["operation"], buckets=HASHING_BUCKETS
+        )
+        self.hashing_rejected = Counter("bcrypt_rejected_total", "bcrypt calls rejected by the queue limit")
+        self.emails = Counter("emails_total", "Email delivery outcomes", ["path", "outcome"])
+
+    def render(self) -> tuple[bytes, str]:
+        from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest, multiprocess
+
+        if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = REGISTRY
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+
+    def serve(self, port: int):
+        """Отдельный HTTP-сервер метрик для процессов без веб-приложения (воркер почты)."""
+        if self.enabled:
+            from prometheus_client import start_http_server
+
+            start_http_server(port)
+
+    def instrument_engine(self, engine: AsyncEngine | None, name: str):
+        if not self.enabled or engine is None:
+            return
+        sync_engine = engine.sync_engine
+        engine.pool.metrics_name = name
+        # labels() создаёт файл значения в PROMETHEUS_MULTIPROC_DIR, поэтому вызывается при первом
+        # использовании в воркере, а не при импорте приложения в мастере gunicorn
+        query_duration = self.db_query_duration.labels
+        checkouts = self.db_checkouts.labels
+        in_use = self.db_in_use.labels
+
+        @event.listens_for(sync_engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("metrics_query_started", []).append(time.perf_counter())
+
+        @event.listens_for(sync_engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            query_duration(name).observe(time.perf_counter() - conn.info["metrics_query_started"].pop())
+
+        @event.listens_for(sync_engine, "handle_error")
+        def handle_error(context):
+            if context.connection is not None and context.connection.info.get("metrics_query_started"):
+                context.connection.info["metrics_query_started"].pop()
+
+        @event.listens_for(sync_engine, "checkout")
+        def checkout(dbapi_connection, connection_record, connection_proxy):
+            checkouts(name).inc()
+            in_use(name).inc()
+
+        @event.listens_for(sync_engine, "checkin")
+        def checkin(dbapi_connection, connection_record):
+            in_use(name).dec()
+
+    def observe_pool_wait(self, name: str, seconds: float):
+        if self.enabled:
+            self.db_pool_wait.labels(name).observe(seconds)
+
+    def observe_redis(self, command: str, seconds: float):
+        if self.enabled:
+            self.redis_duration.labels(command).observe(seconds)
+
+    def observe_hashing(self, operation: str, wait: float, execute: float):
+        if self.enabled:
+            self.hashing_wait.labels(operation).observe(wait)
+            self.hashing_execute.labels(operation).observe(execute)
+
+    def observe_hashing_rejected(self):
+        if self.enabled:
+            self.hashing_rejected.inc()
+
+    def observe_email(self, path: str, outcome: str):
+        if self.enabled:
+            self.emails.labels(path, outcome).inc()
+
+
+class MetricsMiddleware:
+    """ASGI middleware: число, длительность и запросы в обработке по шаблону маршрута."""
+
+    def __init__(self, app, metrics: Metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        method = scope["method"]
+        in_progress = self.metrics.http_in_progress.labels(method)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_progress.dec()
+            # Шаблон пути вместо самого пути, чтобы число рядов не зависело от id и токенов в URL
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            self.metrics.http_requests.labels(method, path, status_code).inc()
+            self.metrics.http_duration.labels(method, path).observe(elapsed)
+
+
+metrics = Metrics(settings.METRICS_ENABLED)
@@ -0,0 +1,77 @@
+import time
+
+from redis.asyncio.client import Pipeline
+
+from app.config.main import settings
+from app.config.redis import RedisService, redis_for_auth
+
+# Перенос наступивших повторов из retry в поток одним атомарным вызовом: письмо не теряется между ZREM и XADD.
+# KEYS[1] - retry, KEYS[2] - поток, ARGV: текущее время, сколько писем перенести, MAXLEN потока.
+RELEASE_DUE_LUA = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], 0, ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, payload in ipairs(due) do
+    local fields = {}
+    for name, value in pairs(cjson.decode(payload)) do
+        table.insert(fields, name)
+        table.insert(fields, tostring(value))
+    end
+    redis.call('XADD', KEYS[2], 'MAXLEN', '~', ARGV[3], '*', unpack(fields))
+    redis.call('ZREM', KEYS[1], payload)
+end
+return #due
+"""
+
+
+class EmailOutbox:
+    """Очередь исходящих писем в Redis Streams. Письма отправляет отдельный процесс app.workers.email_worker.
+
+    stream - новые письма, retry - отложенные повторы (sorted set по времени), dead - письма,
+    исчерпавшие попытки, stats - счётчики воркеров.
+    """
+
+    group = "email-workers"
+
+    def __init__(self, redis: RedisService, stream: str):
+        self.redis = redis
+        # Перенос повторов (Lua) и подтверждение письма (MULTI) работают с несколькими ключами очереди сразу,
+        # с hash_tags все они в одном слоте кластера: {outbox:email}, {outbox:email}:retry, ...
+        self.stream = f"{{{stream}}}" if redis.hash_tags else stream
+        self.retry_key = f"{self.stream}:retry"
+        self.dead_stream = f"{self.stream}:dead"
+        self.stats_key = f"{self.stream}:stats"
+        self._release_due_script = redis.register_script(RELEASE_DUE_LUA)
+
+    def enqueue(self, pipe: Pipeline, to_email: str, subject: str, body: str):
+        """Добавить письмо в очередь в составе pipeline вызывающего кода."""
+        pipe.xadd(
+            self.stream,
+            {"to": to_email, "subject": subject, "body": body, "attempt": 0},
+            maxlen=settings.EMAIL_OUTBOX_MAXLEN,
+            approximate=True,
+        )
+
+    async def release_due_retries(self, limit: int = 100) -> int:
+        """Вернуть в поток письма, время повтора которых наступило. Возвращает их число."""
+        return await self._release_due_script(
+            keys=[self.retry_key, self.stream], args=[time.time(), limit, settings.EMAIL_OUTBOX_MAXLEN]
+        )
+
+    async def stats(self) -> dict:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.xlen(self.stream)
+            pipe.xrange(self.stream, count=1)
+            pipe.zcard(self.retry_key)
+            pipe.xlen(self.dead_stream)
+            pipe.hgetall(self.stats_key)
+            queued, oldest, retrying, dead, counters = await pipe.execute()
+        lag_seconds = time.time() - int(oldest[0][0].split("-")[0]) / 1000 if oldest else 0.0
+        return {
+            "queued": queued,
+            "retrying": retrying,
+            "dead": dead,
+            "lag_seconds": round(lag_seconds, 3),
+            **{key: int(value) for key, value in counters.items()},
+        }
+
+
+email_outbox = EmailOutbox(redis_for_auth, settings.EMAIL_OUTBOX_STREAM)
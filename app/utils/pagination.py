@@ -0,0 +1,17 @@
+import base64
+import binascii
+import uuid
+
+from fastapi import HTTPException, status
+
+
+def encode_cursor(last_id: uuid.UUID) -> str:
+    """Непрозрачный токен продолжения: id последней записи страницы."""
+    return base64.urlsafe_b64encode(last_id.bytes).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> uuid.UUID:
+    try:
+        return uuid.UUID(bytes=base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Некорректный курсор")
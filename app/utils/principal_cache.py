@@ -0,0 +1,132 @@
+import hashlib
+import json
+import uuid
+from typing import Awaitable, Callable
+
+from loguru import logger
+from redis.exceptions import RedisError
+from sqlalchemy import inspect
+
+from app.config.main import settings
+from app.config.redis import RedisService, redis_for_auth
+from app.models.user import User
+from app.utils.lru import TTLCache
+from app.utils.pubsub import pubsub_listener
+
+INVALIDATION_CHANNEL = "principal:invalidate"
+
+_COLUMNS = [attr.key for attr in inspect(User).column_attrs]
+# Формат записи в Redis: после добавления колонки старые записи без неё перестают читаться
+_FORMAT = hashlib.sha256(",".join(_COLUMNS).encode()).hexdigest()[:8]
+
+
+def _dump(user: User) -> dict:
+    data = {key: getattr(user, key) for key in _COLUMNS}
+    data["id"] = str(data["id"])
+    return data
+
+
+def _load(data: dict) -> User:
+    return User(**{**data, "id": uuid.UUID(data["id"])})
+
+
+class PrincipalCache:
+    """Двухуровневый кэш пользователей для авторизации: LRU воркера + общий слой в Redis.
+
+    Изменения пользователя рассылаются через pub/sub, локальный TTL ограничивает
+    устаревание, если сообщение об инвалидации было потеряно.
+    """
+
+    def __init__(self, redis: RedisService, size: int, ttl: int, redis_ttl: int, enabled: bool = True):
+        self.redis = redis
+        self.redis_ttl = redis_ttl
+        self.enabled = enabled
+        self._local = TTLCache(maxsize=size, ttl=ttl)
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _key(self, user_id) -> str:
+        return self.redis.key("principal", user_id, _FORMAT)
+
+    async def get_or_load(self, user_id: str, loader: Callable[[], Awaitable[User | None]]) -> User | None:
+        if not self.enabled:
+            return await loader()
+        user_id = str(user_id)
+        data = self._local.get(user_id)
+        if data is not None:
+            self.local_hits += 1
+            return _load(data)
+        try:
+            raw = await self.redis.get(self._key(user_id))
+        except RedisError as e:
+            logger.warning(f"Principal cache read failed: {e}")
+            raw = None
+        if raw:
+            self.redis_hits += 1
+            data = json.loads(raw)
+            self._local.set(user_id, data)
+            return _load(data)
+
+        self.misses += 1
+        user = await loader()
+        if user:
+            data = _dump(user)
+            # NX: строка могла быть прочитана из отстающей реплики, значение, записанное invalidate(fresh=...)
+            # за это время, важнее. Тогда и в локальный кэш ничего не кладём
+            try:
+                stored = await self.redis.set(self._key(user_id), json.dumps(data), ex=self.redis_ttl, nx=True)
+            except RedisError as e:
+                logger.warning(f"Principal cache write failed: {e}")
+                stored = True
+            if stored:
+                self._local.set(user_id, data)
+        return user
+
+    def drop_local(self, user_id: str):
+        self._local.pop(str(user_id))
+
+    async def invalidate(self, user_id, fresh: User | None = None):
+        """Сбросить пользователя в обоих уровнях кэша и оповестить остальные воркеры.
+
+        Если передан fresh, в Redis сразу записывается актуальная версия: иначе следующий промах
+        мог бы прочитать из реплики ещё не доехавшие изменения.
+        """
+        if not self.enabled:
+            return
+        user_id = str(user_id)
+        self.invalidations += 1
+        self.drop_local(user_id)
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                if fresh is not None:
+                    pipe.setex(self._key(user_id), self.redis_ttl, json.dumps(_dump(fresh)))
+                else:
+                    pipe.delete(self._key(user_id))
+                pipe.publish(INVALIDATION_CHANNEL, user_id)
+                await pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Principal cache invalidation failed: {e}")
+
+    def stats(self) -> dict:
+        lookups = self.local_hits + self.redis_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": round((self.local_hits + self.redis_hits) / lookups, 4) if lookups else 0.0,
+            "local": self._local.stats(),
+        }
+
+
+principal_cache = PrincipalCache(
+    redis=redis_for_auth,
+    size=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    redis_ttl=settings.PRINCIPAL_CACHE_REDIS_TTL_SECONDS,
+    enabled=settings.PRINCIPAL_CACHE_ENABLED,
+)
+pubsub_listener.subscribe(INVALIDATION_CHANNEL, principal_cache.drop_local)
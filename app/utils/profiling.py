@@ -0,0 +1,128 @@
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+from collections import defaultdict
+from datetime import UTC, datetime
+from pathlib import Path
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from loguru import logger
+from starlette.requests import Request
+
+from app.config.main import settings
+from app.repositories.unit_of_work import SQLAlchemyUnitOfWork
+from app.utils.dependencies import get_current_principal
+from app.utils.spans import span, start_recording, stop_recording
+
+try:
+    from pyinstrument import Profiler
+except ImportError:
+    Profiler = None
+
+
+def profiled(response_class: type[JSONResponse]) -> type[JSONResponse]:
+    """Класс ответа, рендеринг которого записывается в отрезок "serialization"."""
+
+    class ProfiledResponse(response_class):
+        def render(self, content) -> bytes:
+            with span("serialization"):
+                return super().render(content)
+
+    return ProfiledResponse
+
+
+async def _is_admin(request: Request) -> bool:
+    token = request.cookies.get(settings.ACCESS_TOKEN_NAME)
+    if not token:
+        return False
+    try:
+        async with SQLAlchemyUnitOfWork() as uow:
+            user = await get_current_principal(token, uow)
+    except HTTPException:
+        return False
+    return user.is_admin
+
+
+class ProfilingMiddleware:
+    """Профилирование отдельных запросов: по заголовку от администратора или случайной выборкой.
+
+    Для запроса пишется JSON с разбивкой времени по БД, Redis, bcrypt и сериализации и, если установлен
+    pyinstrument, HTML с семплирующим профилем. Остальные запросы проходят без записи отрезков.
+    """
+
+    def __init__(self, app, header: str, sample_rate: float, output_dir: str, interval: float):
+        self.app = app
+        self.header = header.lower().encode()
+        self.sample_rate = sample_rate
+        self.output_dir = Path(output_dir)
+        self.interval = interval
+        if Profiler is None:
+            logger.warning("Profiling is enabled but pyinstrument is not installed: only span reports will be written")
+
+    async def _should_profile(self, scope) -> bool:
+        if any(name == self.header for name, _ in scope["headers"]):
+            return await _is_admin(Request(scope))
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not await self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        spans, token = start_recording()
+        profiler = Profiler(interval=self.interval, async_mode="enabled") if Profiler else None
+        if profiler:
+            profiler.start()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            if profiler:
+                profiler.stop()
+            stop_recording(token)
+            route = scope.get("route")
+            report = self._report(scope, route.path if route else None, status_code, elapsed, spans)
+            html = profiler.output_html() if profiler else None
+            try:
+                await asyncio.to_thread(self._write, report, html)
+            except OSError as e:
+                logger.warning(f"Profile for {scope['path']} not written: {e}")
+
+    @staticmethod
+    def _report(scope, route: str | None, status_code: int, elapsed: float, spans: list) -> dict:
+        by_kind = defaultdict(lambda: {"count": 0, "total_ms": 0.0})
+        for kind, _, seconds in spans:
+            by_kind[kind]["count"] += 1
+            by_kind[kind]["total_ms"] += seconds * 1000
+        accounted = sum(seconds for _, _, seconds in spans)
+        return {
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": route,
+            "status": status_code,
+            "started_at": datetime.now(UTC).isoformat(),
+            "total_ms": round(elapsed * 1000, 3),
+            "by_kind": {kind: {**totals, "total_ms": round(totals["total_ms"], 3)} for kind, totals in by_kind.items()},
+            "unaccounted_ms": round((elapsed - accounted) * 1000, 3),
+            "spans": [{"kind": kind, "name": name, "ms": round(seconds * 1000, 3)} for kind, name, seconds in spans],
+        }
+
+    def _write(self, report: dict, html: str | None):
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", report["route"] or report["path"]).strip("_") or "root"
+        name = f"{datetime.now(UTC):%Y%m%dT%H%M%S}-{report['method']}-{slug}-{uuid.uuid4().hex[:8]}"
+        (self.output_dir / f"{name}.json").write_text(json.dumps(report, ensure_ascii=False, indent=2))
+        if html:
+            (self.output_dir / f"{name}.html").write_text(html)
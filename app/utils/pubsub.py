@@ -0,0 +1,57 @@
+import asyncio
+from typing import Callable
+
+from loguru import logger
+
+from app.config.redis import RedisService, redis_for_auth
+
+
+class PubSubListener:
+    """Одна подписка Redis pub/sub на воркер, раздающая сообщения обработчикам по каналам."""
+
+    def __init__(self, redis: RedisService):
+        self.redis = redis
+        self._handlers: dict[str, Callable[[str], None]] = {}
+        self._pubsub = None
+        self._task: asyncio.Task | None = None
+
+    def subscribe(self, channel: str, handler: Callable[[str], None]):
+        self._handlers[channel] = handler
+
+    async def start(self):
+        if self._task or not self._handlers:
+            return
+        self._pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.subscribe(*self._handlers)
+        self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._pubsub:
+            await self._pubsub.aclose()
+            self._pubsub = None
+
+    async def _listen(self):
+        while True:
+            try:
+                # Ожидание с явным таймаутом: таймаут сокета пула не должен рвать подписку в тишине
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is None:
+                    continue
+                handler = self._handlers.get(message["channel"])
+                if handler:
+                    handler(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Pub/sub listener error: {e}")
+                await asyncio.sleep(1)
+
+
+pubsub_listener = PubSubListener(redis_for_auth)
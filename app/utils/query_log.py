@@ -0,0 +1,56 @@
+import time
+
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config.main import settings
+from app.utils.spans import record_span
+
+MAX_LOGGED_STATEMENT = 2000
+MAX_DESCRIBED_PARAMETERS = 20
+
+
+def parameters_shape(parameters, executemany: bool = False) -> str:
+    """Форма параметров запроса без значений: типы по позициям или ключам, число строк для executemany."""
+    if executemany:
+        first = parameters_shape(parameters[0]) if parameters else "()"
+        return f"{len(parameters)} x {first}"
+    if isinstance(parameters, dict):
+        items = [f"{key}: {type(value).__name__}" for key, value in parameters.items()]
+        opening, closing = "{", "}"
+    elif isinstance(parameters, (list, tuple)):
+        items = [type(value).__name__ for value in parameters]
+        opening, closing = "(", ")"
+    else:
+        return type(parameters).__name__
+    if len(items) > MAX_DESCRIBED_PARAMETERS:
+        return f"{opening}{len(items)} parameters{closing}"
+    return opening + ", ".join(items) + closing
+
+
+def instrument_engine(engine: AsyncEngine | None, name: str):
+    """Отрезки "db" для профилировщика и журнал запросов дольше SLOW_QUERY_THRESHOLD_MS."""
+    if engine is None or not (settings.PROFILING_ENABLED or settings.SLOW_QUERY_THRESHOLD_MS > 0):
+        return
+    threshold = settings.SLOW_QUERY_THRESHOLD_MS / 1000 if settings.SLOW_QUERY_THRESHOLD_MS > 0 else None
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_log_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_log_started"].pop()
+        record_span("db", statement[:200], elapsed)
+        if threshold is not None and elapsed >= threshold:
+            logger.warning(
+                f"Slow query on {name}: {elapsed * 1000:.1f} ms, "
+                f"parameters {parameters_shape(parameters, executemany)}: {statement[:MAX_LOGGED_STATEMENT]}"
+            )
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(context):
+        if context.connection is not None and context.connection.info.get("query_log_started"):
+            context.connection.info["query_log_started"].pop()
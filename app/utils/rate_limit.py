@@ -0,0 +1,116 @@
+import hashlib
+import math
+import time
+
+from loguru import logger
+from redis.exceptions import RedisError
+
+from app.config.main import settings
+from app.config.redis import RedisService, redis_for_auth
+from app.exceptions.security import TooManyRequestsError
+from app.utils.lru import TTLCache
+
+# Скользящее окно по двум соседним фиксированным окнам. KEYS - пары (текущее, предыдущее) окно для
+# каждого ограничения, ARGV - доля прошедшего окна, длина окна в мс и лимиты. Либо увеличивает все
+# счётчики, либо не трогает ни один и возвращает {мс до повтора, номер сработавшего ограничения}.
+SLIDING_WINDOW_LUA = """
+local elapsed = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+for i = 1, #KEYS / 2 do
+    local current = tonumber(redis.call('GET', KEYS[2 * i - 1]) or '0')
+    local previous = tonumber(redis.call('GET', KEYS[2 * i]) or '0')
+    if previous * (1 - elapsed) + current + 1 > tonumber(ARGV[i + 2]) then
+        return {math.ceil(window * (1 - elapsed)), i}
+    end
+end
+for i = 1, #KEYS / 2 do
+    redis.call('INCR', KEYS[2 * i - 1])
+    redis.call('PEXPIRE', KEYS[2 * i - 1], window * 2)
+end
+return {0, 0}
+"""
+
+
+class RateLimiter:
+    """Ограничение частоты попыток входа и регистрации до любой работы с bcrypt.
+
+    Все ограничения действия проверяются одним атомарным Lua-вызовом. Ключи, на которых Redis уже
+    ответил отказом, запоминаются в памяти воркера до конца блокировки и отклоняются без Redis.
+    При недоступности Redis запросы пропускаются.
+    """
+
+    def __init__(self, redis: RedisService, enabled: bool = True):
+        self.redis = redis
+        self.enabled = enabled
+        self._script = redis.register_script(SLIDING_WINDOW_LUA)
+        self._blocked = TTLCache(maxsize=100_000, ttl=3600)
+        self.allowed = 0
+        self.rejected_local = 0
+        self.rejected_redis = 0
+
+    @staticmethod
+    def identity(value: str) -> str:
+        return hashlib.sha256(value.lower().encode()).hexdigest()[:16]
+
+    async def check(self, action: str, limits: dict[str, int], window_seconds: int):
+        """Учесть попытку action. limits - лимит за окно для каждого ключа, например {"ip:1.2.3.4": 20, "global": 1000}."""
+        if not self.enabled:
+            return
+        names = [f"{action}:{name}" for name in limits]
+        for name in names:
+            blocked_until = self._blocked.get(name)
+            if blocked_until is not None:
+                self.rejected_local += 1
+                raise TooManyRequestsError(retry_after=max(1, math.ceil(blocked_until - time.monotonic())))
+
+        window_ms = window_seconds * 1000
+        now_ms = int(time.time() * 1000)
+        index = now_ms // window_ms
+        # Хеш-тег {action} держит все ключи действия в одном слоте Redis Cluster
+        prefix = f"ratelimit:{{{action}}}"
+        keys = []
+        for name in limits:
+            keys += [f"{prefix}:{name}:{index}", f"{prefix}:{name}:{index - 1}"]
+        try:
+            retry_after_ms, rule = await self._script(
+                keys=keys, args=[(now_ms % window_ms) / window_ms, window_ms, *limits.values()]
+            )
+        except RedisError as e:
+            logger.warning(f"Rate limiter unavailable: {e}")
+            return
+        if retry_after_ms:
+            retry_after = retry_after_ms / 1000
+            self._blocked.set(names[rule - 1], time.monotonic() + retry_after, ttl=retry_after)
+            self.rejected_redis += 1
+            raise TooManyRequestsError(retry_after=max(1, math.ceil(retry_after)))
+        self.allowed += 1
+
+    async def check_login(self, client_ip: str, email: str):
+        await self.check(
+            "login",
+            {
+                f"ip:{client_ip}": settings.LOGIN_LIMIT_PER_IP,
+                f"email:{self.identity(email)}": settings.LOGIN_LIMIT_PER_EMAIL,
+                "global": settings.LOGIN_LIMIT_GLOBAL,
+            },
+            settings.LOGIN_LIMIT_WINDOW_SECONDS,
+        )
+
+    async def check_register(self, client_ip: str):
+        await self.check(
+            "register",
+            {f"ip:{client_ip}": settings.REGISTER_LIMIT_PER_IP, "global": settings.REGISTER_LIMIT_GLOBAL},
+            settings.REGISTER_LIMIT_WINDOW_SECONDS,
+        )
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "allowed": self.allowed,
+            "rejected_local": self.rejected_local,
+            "rejected_redis": self.rejected_redis,
+            "blocked_keys": len(self._blocked),
+        }
+
+
+rate_limiter = RateLimiter(redis_for_auth, enabled=settings.RATE_LIMIT_ENABLED)
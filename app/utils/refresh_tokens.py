@@ -0,0 +1,115 @@
+import time
+import uuid
+from enum import IntEnum
+
+from fastapi import HTTPException, status
+
+from app.config.main import settings
+from app.config.redis import RedisService, redis_for_auth
+
+# Compare-and-swap ротации семейства. KEYS[1] - хеш пользователя, ARGV: id семейства, ожидаемый id
+# ротации, новое значение, текущее время, TTL ключа, окно для предыдущего id. Ответ - {RotationResult, id ротации}.
+ROTATE_LUA = """
+local stored = redis.call('HGET', KEYS[1], ARGV[1])
+if not stored then
+    return {1}
+end
+local current, expires, previous, grace_until = string.match(stored, '^([^:]+):(%d+):?([^:]*):?(%d*)$')
+if current ~= ARGV[2] then
+    if previous == ARGV[2] and tonumber(grace_until) > tonumber(ARGV[4]) then
+        return {4, current}
+    end
+    redis.call('HDEL', KEYS[1], ARGV[1])
+    return {2}
+end
+if tonumber(expires) < tonumber(ARGV[4]) then
+    redis.call('HDEL', KEYS[1], ARGV[1])
+    return {3}
+end
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[3] .. ':' .. ARGV[2] .. ':' .. (tonumber(ARGV[4]) + tonumber(ARGV[6])))
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+return {0}
+"""
+
+
+class RotationResult(IntEnum):
+    REPLACED = 0
+    MISSING = 1
+    REUSED = 2
+    EXPIRED = 3
+    CONCURRENT = 4
+
+
+ROTATION_ERRORS = {
+    RotationResult.MISSING: "Refresh-токен не найден",
+    RotationResult.REUSED: "Refresh-токен уже использован, сессия отозвана",
+    RotationResult.EXPIRED: "Refresh-токен истёк",
+}
+
+
+class RefreshTokenStore:
+    """Семейства refresh-токенов: одно на устройство (вход), все - в одном хеше Redis на пользователя.
+
+    Поле хеша - id семейства, значение - "<id текущей ротации>:<срок действия>[:<предыдущий id>:<до>]".
+    Каждое обновление выдаёт новый id ротации атомарно на стороне Redis; предъявление старого означает
+    повторное использование токена, и всё семейство отзывается. Исключение - предыдущий id в течение
+    grace секунд после ротации: это параллельное обновление с того же устройства (например, из двух вкладок),
+    оно получает токены текущей ротации. Выход со всех устройств - удаление одного ключа.
+    """
+
+    def __init__(self, redis: RedisService, ttl: int, grace: int):
+        self.redis = redis
+        self.ttl = ttl
+        self.grace = grace
+        self._rotate_script = redis.register_script(ROTATE_LUA)
+
+    def _key(self, user_id) -> str:
+        return self.redis.key("rtf", user_id)
+
+    @staticmethod
+    def _new_id() -> str:
+        return uuid.uuid4().hex[:16]
+
+    def _value(self, rotation_id: str) -> str:
+        return f"{rotation_id}:{int(time.time()) + self.ttl}"
+
+    async def issue(self, user_id) -> tuple[str, str]:
+        """Начать новое семейство при входе. Возвращает (id семейства, id ротации)."""
+        family_id, rotation_id = self._new_id(), self._new_id()
+        key = self._key(user_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, family_id, self._value(rotation_id))
+            pipe.expire(key, self.ttl)
+            pipe.hgetall(key)
+            _, _, families = await pipe.execute()
+        now = time.time()
+        expired = [family for family, value in families.items() if int(value.split(":")[1]) < now]
+        if expired:
+            await self.redis.hdel(key, *expired)
+        return family_id, rotation_id
+
+    async def rotate(self, user_id, family_id: str, rotation_id: str) -> str:
+        """Проверить и заменить ротацию семейства одним Lua-вызовом. Возвращает id ротации для новых токенов:
+        новый или, при параллельном обновлении в окне grace, текущий."""
+        new_rotation_id = self._new_id()
+        code, *current = await self._rotate_script(
+            keys=[self._key(user_id)],
+            args=[family_id, rotation_id, self._value(new_rotation_id), int(time.time()), self.ttl, self.grace],
+        )
+        result = RotationResult(code)
+        if result is RotationResult.CONCURRENT:
+            return current[0]
+        if result is not RotationResult.REPLACED:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=ROTATION_ERRORS[result])
+        return new_rotation_id
+
+    async def revoke(self, user_id, family_id: str):
+        await self.redis.hdel(self._key(user_id), family_id)
+
+    async def revoke_all(self, user_id):
+        await self.redis.delete(self._key(user_id))
+
+
+refresh_store = RefreshTokenStore(
+    redis_for_auth, ttl=settings.REFRESH_TOKEN_EXPIRE_SECONDS, grace=settings.REFRESH_ROTATION_GRACE_SECONDS
+)
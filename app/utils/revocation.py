@@ -0,0 +1,115 @@
+import asyncio
+import time
+
+from loguru import logger
+from redis.exceptions import RedisError
+
+from app.config.main import settings
+from app.config.redis import RedisService, redis_for_auth
+from app.utils.bloom import BloomFilter
+from app.utils.pubsub import pubsub_listener
+
+REVOCATION_CHANNEL = "revoked:jti"
+
+
+class RevocationList:
+    """Отозванные access-токены (по jti).
+
+    Источник истины - ключи revoked:<jti> в Redis с TTL до истечения токена. Каждый воркер держит
+    фильтр Блума по ним: он строится при старте, пополняется через pub/sub и периодически
+    перестраивается, чтобы забыть истёкшие токены. В Redis идём только при срабатывании фильтра.
+    """
+
+    def __init__(self, redis: RedisService, capacity: int, error_rate: float, rebuild_seconds: int):
+        self.redis = redis
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.rebuild_seconds = rebuild_seconds
+        self._filter = BloomFilter(capacity, error_rate)
+        self._rebuilding: BloomFilter | None = None
+        self._task: asyncio.Task | None = None
+        self.checks = 0
+        self.filter_hits = 0
+        self.confirmed = 0
+
+    def _key(self, jti: str) -> str:
+        return self.redis.key("revoked", jti)
+
+    def remember(self, jti: str):
+        self._filter.add(jti)
+        if self._rebuilding is not None:
+            self._rebuilding.add(jti)
+
+    async def revoke(self, jti: str, expires_at: float):
+        ttl = int(expires_at - time.time()) + 1
+        if ttl <= 0:
+            return
+        self.remember(jti)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.setex(self._key(jti), ttl, 1)
+            pipe.publish(REVOCATION_CHANNEL, jti)
+            await pipe.execute()
+
+    async def is_revoked(self, jti: str | None) -> bool:
+        if not jti:
+            return False
+        self.checks += 1
+        if jti not in self._filter:
+            return False
+        self.filter_hits += 1
+        try:
+            revoked = bool(await self.redis.exists(self._key(jti)))
+        except RedisError as e:
+            logger.warning(f"Revocation check failed, treating token as revoked: {e}")
+            return True
+        self.confirmed += revoked
+        return revoked
+
+    async def rebuild(self):
+        """Построить фильтр заново по ключам Redis; отзывы, пришедшие во время сканирования, не теряются."""
+        self._rebuilding = BloomFilter(self.capacity, self.error_rate)
+        try:
+            async for key in self.redis.scan_iter(match=self._key("*"), count=1000):
+                self._rebuilding.add(key.split(":", 1)[1].strip("{}"))
+            self._filter = self._rebuilding
+        finally:
+            self._rebuilding = None
+
+    async def _rebuild_periodically(self):
+        while True:
+            await asyncio.sleep(self.rebuild_seconds)
+            try:
+                await self.rebuild()
+            except RedisError as e:
+                logger.warning(f"Revocation filter rebuild failed: {e}")
+
+    async def start(self):
+        await self.rebuild()
+        self._task = asyncio.create_task(self._rebuild_periodically())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "filter_entries": self._filter.count,
+            "checks": self.checks,
+            "filter_hits": self.filter_hits,
+            "confirmed": self.confirmed,
+            "false_positives": self.filter_hits - self.confirmed,
+        }
+
+
+revocation_list = RevocationList(
+    redis=redis_for_auth,
+    capacity=settings.REVOCATION_BLOOM_CAPACITY,
+    error_rate=settings.REVOCATION_BLOOM_ERROR_RATE,
+    rebuild_seconds=settings.REVOCATION_REBUILD_SECONDS,
+)
+pubsub_listener.subscribe(REVOCATION_CHANNEL, revocation_list.remember)
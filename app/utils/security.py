@@ -1,43 +1,131 @@
+import hashlib
+import json
+import time
+import uuid
 from datetime import UTC, datetime, timedelta
+from pathlib import Path
 
 import jwt
+from cryptography.hazmat.primitives.serialization import load_pem_private_key, load_pem_public_key
 from fastapi import HTTPException, status
-from passlib.context import CryptContext
+from jwt.algorithms import get_default_algorithms
 
 from app.config.main import settings
+from app.utils.hashing import password_hasher
+from app.utils.lru import TTLCache
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_SIZE, ttl=settings.TOKEN_CACHE_TTL_SECONDS)
 
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+class KeyRing:
+    """Набор ключей подписи JWT.
 
+    Для HS* используется SECRET_KEY. Для асимметричных алгоритмов (EdDSA, RS256, ES256...)
+    ключи читаются из каталога keys_dir: файл <kid>.pem с приватным ключом может подписывать,
+    файл только с публичным ключом используется лишь для проверки (ротированный ключ).
+    Подписывает активный ключ, проверяются все ключи каталога по kid из заголовка токена.
+    Объекты ключей разбираются один раз при загрузке.
+    """
 
-def verify_password(plain_password, hashed_password) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    def __init__(self, algorithm: str, secret_key: str, keys_dir: str, active_kid: str | None = None):
+        self.algorithm = algorithm
+        self.asymmetric = not algorithm.startswith("HS")
+        self.active_kid: str | None = None
+        self._signing_key = secret_key
+        self._verification_keys: dict[str, object] = {}
+        self.jwks: dict = {"keys": []}
+        if self.asymmetric:
+            self._load(Path(keys_dir), active_kid)
+        self.jwks_json = json.dumps(self.jwks, separators=(",", ":")).encode()
 
+    def _load(self, keys_dir: Path, active_kid: str | None):
+        private_keys = {}
+        jwk_algorithm = get_default_algorithms()[self.algorithm]
+        for path in sorted(keys_dir.glob("*.pem")):
+            kid = path.name.removesuffix(".pem")
+            data = path.read_bytes()
+            try:
+                private_keys[kid] = load_pem_private_key(data, password=None)
+                public_key = private_keys[kid].public_key()
+            except ValueError:
+                public_key = load_pem_public_key(data)
+            self._verification_keys[kid] = public_key
+            jwk = jwk_algorithm.to_jwk(public_key, as_dict=True)
+            self.jwks["keys"].append({**jwk, "kid": kid, "use": "sig", "alg": self.algorithm})
 
-async def create_token(data: dict, expires_delta: timedelta, secret_key: str = settings.SECRET_KEY) -> str:
+        self.active_kid = active_kid or max(private_keys, default=None)
+        if self.active_kid not in private_keys:
+            raise RuntimeError(f"Не найден приватный ключ для подписи JWT в {keys_dir} (kid={self.active_kid})")
+        self._signing_key = private_keys[self.active_kid]
+
+    def sign(self, payload: dict) -> str:
+        headers = {"kid": self.active_kid} if self.active_kid else None
+        return jwt.encode(payload, self._signing_key, algorithm=self.algorithm, headers=headers)
+
+    def verification_key(self, token: str):
+        if not self.asymmetric:
+            return self._signing_key
+        kid = jwt.get_unverified_header(token).get("kid")
+        key = self._verification_keys.get(kid)
+        if key is None:
+            raise jwt.InvalidTokenError(f"Unknown kid: {kid}")
+        return key
+
+
+key_ring = KeyRing(
+    algorithm=settings.ALGORITHM,
+    secret_key=settings.SECRET_KEY,
+    keys_dir=settings.JWT_KEYS_DIR,
+    active_kid=settings.JWT_ACTIVE_KID,
+)
+
+
+async def get_password_hash(password: str) -> str:
+    return await password_hasher.hash(password)
+
+
+async def verify_password(plain_password, hashed_password) -> bool:
+    return await password_hasher.verify(plain_password, hashed_password)
+
+
+async def create_token(data: dict, expires_delta: timedelta) -> str:
     to_encode = data.copy()
     expire = datetime.now(UTC) + expires_delta
     to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, secret_key, algorithm=settings.ALGORITHM)
+    return key_ring.sign(to_encode)
 
 
 async def create_access_token(data: dict) -> str:
-    return await create_token(data, timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
+    return await create_token(
+        {"jti": uuid.uuid4().hex, **data}, timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
 
 
 async def create_refresh_token(data: dict) -> str:
     return await create_token(data, timedelta(days=14))
 
 
-async def decode_token(token: str, secret_key: str = settings.SECRET_KEY, verify_exp: bool = True) -> dict:
+async def decode_token(token: str, verify_exp: bool = True) -> dict:
+    """Проверить подпись и срок действия токена.
+
+    Проверенные payload кэшируются до их exp, поэтому попадание в кэш валидно
+    для обоих режимов verify_exp; просроченные токены всегда проверяются заново.
+    """
+    cache_key = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(cache_key)
+    if payload is not None:
+        return payload.copy()
     try:
-        return jwt.decode(
-            jwt=token, key=secret_key, algorithms=[settings.ALGORITHM], options={"verify_exp": verify_exp}
+        payload = jwt.decode(
+            jwt=token,
+            key=key_ring.verification_key(token),
+            algorithms=[key_ring.algorithm],
+            options={"verify_exp": verify_exp},
         )
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Токен истёк")
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Токен невалиден")
+    if isinstance(payload.get("exp"), (int, float)):
+        token_cache.set(cache_key, payload, ttl=payload["exp"] - time.time())
+    return payload.copy()
@@ -0,0 +1,44 @@
+from operator import attrgetter, itemgetter
+
+import orjson
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+from app.schemas.user import SLoginAnswer, SUserMe
+from app.utils.spans import span
+
+
+class ResponseSerializer:
+    """Ответ по схеме pydantic без повторной валидации: поля схемы берутся из атрибутов ORM-объекта
+    (или ключей словаря) одним заранее собранным getter и кодируются orjson.
+
+    Подходит только для данных, которые уже проверены: строк из БД, кэшированных пользователей, выпущенных токенов.
+    """
+
+    def __init__(self, schema: type[BaseModel]):
+        self.fields = tuple(schema.model_fields)
+        self._from_attributes = attrgetter(*self.fields)
+        self._from_mapping = itemgetter(*self.fields)
+
+    def content(self, source) -> dict:
+        values = self._from_mapping(source) if isinstance(source, dict) else self._from_attributes(source)
+        if len(self.fields) == 1:
+            values = (values,)
+        return dict(zip(self.fields, values))
+
+    def dumps(self, source) -> bytes:
+        return orjson.dumps(self.content(source))
+
+    def response(self, source, sub_response: Response | None = None) -> Response:
+        """Готовый ответ. Заголовки sub_response (например, cookie с токеном) переносятся в него:
+        FastAPI сам делает это только для ответов, которые сериализует он."""
+        with span("serialization"):
+            content = self.dumps(source)
+        response = Response(content=content, media_type="application/json")
+        if sub_response is not None:
+            response.headers.raw.extend(sub_response.headers.raw)
+        return response
+
+
+user_me_serializer = ResponseSerializer(SUserMe)
+login_answer_serializer = ResponseSerializer(SLoginAnswer)
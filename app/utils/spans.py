@@ -0,0 +1,35 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+
+# Список отрезков профилируемого запроса. None - запрос не профилируется, запись ничего не стоит
+_spans: ContextVar[list | None] = ContextVar("profiling_spans", default=None)
+
+
+def start_recording() -> tuple[list, Token]:
+    spans = []
+    return spans, _spans.set(spans)
+
+
+def stop_recording(token: Token):
+    _spans.reset(token)
+
+
+def record_span(kind: str, name: str, seconds: float):
+    """Записать отрезок (БД, Redis, bcrypt, сериализация), если текущий запрос профилируется."""
+    spans = _spans.get()
+    if spans is not None:
+        spans.append((kind, name, seconds))
+
+
+@contextmanager
+def span(kind: str, name: str = ""):
+    spans = _spans.get()
+    if spans is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        spans.append((kind, name, time.perf_counter() - started))
@@ -0,0 +1,135 @@
+"""Воркер исходящей почты.
+
+python -m app.workers.email_worker
+"""
+
+import asyncio
+import json
+import os
+import random
+import signal
+import socket
+import time
+
+from loguru import logger
+from redis.exceptions import ResponseError
+
+from app.config.main import settings
+from app.config.redis import redis_for_auth
+from app.utils.email import SMTPPool
+from app.utils.metrics import metrics
+from app.utils.outbox import EmailOutbox, email_outbox
+
+
+class EmailWorker:
+    """Читает письма из outbox пачками и рассылает их через пул SMTP-соединений.
+
+    Неудачные письма откладываются с экспоненциальной задержкой, после EMAIL_MAX_ATTEMPTS
+    попыток уходят в dead-поток. Письма, зависшие у упавшего воркера, забираются через XAUTOCLAIM.
+    """
+
+    def __init__(self, outbox: EmailOutbox, smtp_pool: SMTPPool):
+        self.outbox = outbox
+        self.redis = outbox.redis
+        self.smtp_pool = smtp_pool
+        self.consumer = f"{socket.gethostname()}-{os.getpid()}"
+        self._stopping = asyncio.Event()
+        self._sent_since_report = 0
+        self._reported_at = time.monotonic()
+
+    def stop(self):
+        self._stopping.set()
+
+    async def _ensure_group(self):
+        try:
+            await self.redis.xgroup_create(self.outbox.stream, self.outbox.group, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def _read_batch(self) -> list[tuple[str, dict]]:
+        claimed = await self.redis.xautoclaim(
+            self.outbox.stream,
+            self.outbox.group,
+            self.consumer,
+            min_idle_time=settings.EMAIL_WORKER_CLAIM_IDLE_SECONDS * 1000,
+            count=settings.EMAIL_WORKER_BATCH_SIZE,
+        )
+        if claimed[1]:
+            return claimed[1]
+        response = await self.redis.xreadgroup(
+            self.outbox.group,
+            self.consumer,
+            {self.outbox.stream: ">"},
+            count=settings.EMAIL_WORKER_BATCH_SIZE,
+            block=1000,
+        )
+        return response[0][1] if response else []
+
+    async def _deliver(self, message_id: str, fields: dict) -> str:
+        try:
+            await self.smtp_pool.send(fields["to"], fields["subject"], fields["body"])
+            outcome = "sent"
+        except Exception as e:
+            outcome = await self._schedule_retry(fields, e)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.xack(self.outbox.stream, self.outbox.group, message_id)
+            pipe.xdel(self.outbox.stream, message_id)
+            pipe.hincrby(self.outbox.stats_key, outcome, 1)
+            await pipe.execute()
+        metrics.observe_email("worker", outcome)
+        return outcome
+
+    async def _schedule_retry(self, fields: dict, error: Exception) -> str:
+        attempt = int(fields.get("attempt", 0)) + 1
+        payload = {**fields, "attempt": attempt, "error": str(error)[:500]}
+        if attempt >= settings.EMAIL_MAX_ATTEMPTS:
+            logger.error(f"Email to {fields['to']} dead-lettered after {attempt} attempts: {error}")
+            await self.redis.xadd(self.outbox.dead_stream, payload)
+            return "dead"
+        delay = settings.EMAIL_RETRY_BASE_SECONDS * 2 ** (attempt - 1) * random.uniform(0.8, 1.2)
+        logger.warning(f"Email to {fields['to']} failed (attempt {attempt}), retry in {delay:.1f}s: {error}")
+        await self.redis.zadd(self.outbox.retry_key, {json.dumps(payload): time.time() + delay})
+        return "retried"
+
+    def _report(self, sent: int):
+        self._sent_since_report += sent
+        elapsed = time.monotonic() - self._reported_at
+        if elapsed >= 60:
+            logger.info(f"Email worker throughput: {self._sent_since_report / elapsed:.2f} msg/s")
+            self._sent_since_report = 0
+            self._reported_at = time.monotonic()
+
+    async def run(self):
+        await self._ensure_group()
+        logger.info(f"Email worker {self.consumer} started, SMTP pool of {self.smtp_pool.size}")
+        while not self._stopping.is_set():
+            try:
+                await self.outbox.release_due_retries()
+                batch = await self._read_batch()
+                outcomes = await asyncio.gather(*(self._deliver(message_id, fields) for message_id, fields in batch))
+                self._report(outcomes.count("sent"))
+            except Exception as e:
+                logger.exception(f"Email worker error: {e}")
+                await asyncio.sleep(1)
+
+
+async def main():
+    metrics.serve(settings.EMAIL_WORKER_METRICS_PORT)
+    await redis_for_auth.connect()
+    smtp_pool = SMTPPool(
+        size=settings.EMAIL_WORKER_SMTP_CONNECTIONS, max_messages=settings.SMTP_MESSAGES_PER_CONNECTION
+    )
+    worker = EmailWorker(email_outbox, smtp_pool)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+    try:
+        await worker.run()
+    finally:
+        await smtp_pool.close()
+        await redis_for_auth.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,106 @@
+"""Нагрузочный прогон сценария register -> confirm -> login -> me -> refresh -> logout.
+
+python -m benchmarks.load --users 20 --duration 30 --output load.json
+
+Приложение вызывается в процессе через httpx.ASGITransport. Нужен доступный локальный Postgres
+(BENCH_POSTGRES_HOST/PORT/USER/PASSWORD): стенд создаёт на нём временную базу и удаляет её в конце.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.load.report import build_report
+from benchmarks.load.scenario import Recorder, user_journey
+from benchmarks.load.stand import configure_environment, free_port, smtp_sink, throwaway_database
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Нагрузочный прогон сервиса авторизации")
+    parser.add_argument("--users", type=int, default=20, help="Число одновременных виртуальных пользователей")
+    parser.add_argument("--duration", type=float, default=30, help="Длительность замера, секунд")
+    parser.add_argument("--warmup", type=float, default=5, help="Прогрев без записи результатов, секунд")
+    parser.add_argument("--me-requests", type=int, default=5, help="Запросов /users/me/ на один вход")
+    parser.add_argument("--output", help="Файл для JSON-отчёта, по умолчанию stdout")
+    return parser.parse_args()
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def virtual_user(transport, sink, recorder: Recorder, me_requests: int, deadline: float):
+    while time.monotonic() < deadline:
+        await user_journey(transport, sink, recorder, me_requests)
+
+
+async def run_load(args: argparse.Namespace, sink) -> dict:
+    from app.config.database import engine
+    from app.main import app
+    from benchmarks.load.stand import create_schema, use_fake_redis
+
+    await create_schema()
+    use_fake_redis()
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False, client=("127.0.0.1", 50000))
+    recorder = Recorder()
+    try:
+        async with app.router.lifespan_context(app):
+            started = time.monotonic()
+            recorder.enabled = False
+            deadline = started + args.warmup + args.duration
+            users = [
+                asyncio.create_task(virtual_user(transport, sink, recorder, args.me_requests, deadline))
+                for _ in range(args.users)
+            ]
+            await asyncio.sleep(args.warmup)
+            recorder.enabled = True
+            measured_from = time.monotonic()
+            await asyncio.gather(*users)
+            elapsed = time.monotonic() - measured_from
+    finally:
+        await engine.dispose()
+
+    from app.config.main import settings
+
+    meta = {
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "users": args.users,
+        "duration_seconds": args.duration,
+        "warmup_seconds": args.warmup,
+        "me_requests": args.me_requests,
+        "hashing_executor": settings.HASHING_EXECUTOR,
+        "hashing_max_workers": settings.HASHING_MAX_WORKERS,
+        "stateless_auth": settings.STATELESS_AUTH,
+        "emails_received": sink.received,
+    }
+    return build_report(recorder, elapsed, meta)
+
+
+async def main(args: argparse.Namespace):
+    smtp_port = free_port()
+    async with throwaway_database() as database:
+        configure_environment(database, smtp_port)
+        async with smtp_sink(smtp_port) as sink:
+            report = await run_load(args, sink)
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+    else:
+        sys.stdout.write(output + "\n")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
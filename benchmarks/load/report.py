@@ -0,0 +1,43 @@
+import math
+
+from benchmarks.load.scenario import Recorder
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """Перцентиль методом ближайшего ранга."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def build_report(recorder: Recorder, elapsed: float, meta: dict) -> dict:
+    endpoints = {}
+    for name, latencies in recorder.latencies.items():
+        values = sorted(latencies)
+        requests = len(values)
+        endpoints[name] = {
+            "requests": requests,
+            "errors": recorder.errors[name],
+            "error_rate": round(recorder.errors[name] / requests, 4),
+            "throughput_rps": round(requests / elapsed, 2),
+            "latency_ms": {
+                "mean": round(sum(values) / requests * 1000, 3),
+                "p50": round(percentile(values, 50) * 1000, 3),
+                "p95": round(percentile(values, 95) * 1000, 3),
+                "p99": round(percentile(values, 99) * 1000, 3),
+                "max": round(values[-1] * 1000, 3),
+            },
+            "status_codes": {str(code): count for code, count in sorted(recorder.statuses[name].items())},
+        }
+    total = sum(endpoint["requests"] for endpoint in endpoints.values())
+    return {
+        "meta": {**meta, "elapsed_seconds": round(elapsed, 3)},
+        "total": {
+            "requests": total,
+            "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+            "journeys_completed": recorder.journeys_completed,
+            "journeys_failed": recorder.journeys_failed,
+        },
+        "endpoints": endpoints,
+    }
@@ -0,0 +1,73 @@
+import itertools
+import time
+import uuid
+from collections import defaultdict
+
+import httpx
+
+from benchmarks.load.stand import MailSink
+
+PASSWORD = "bench-password"
+_phones = itertools.count(7_000_000_000)
+
+
+class Recorder:
+    """Задержки и коды ответов по шагам сценария."""
+
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.statuses: dict[str, dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self.journeys_completed = 0
+        self.journeys_failed = 0
+        self.enabled = True
+
+    async def step(self, name: str, request) -> httpx.Response:
+        started = time.perf_counter()
+        response = await request
+        if self.enabled:
+            self.latencies[name].append(time.perf_counter() - started)
+            self.statuses[name][response.status_code] += 1
+            if response.status_code >= 400:
+                self.errors[name] += 1
+        return response
+
+
+class StepFailed(Exception):
+    pass
+
+
+def _check(response: httpx.Response):
+    if response.status_code >= 400:
+        raise StepFailed(f"{response.request.method} {response.request.url.path}: {response.status_code}")
+
+
+async def user_journey(transport: httpx.ASGITransport, sink: MailSink, recorder: Recorder, me_requests: int):
+    """register -> confirm -> login -> me x N -> refresh -> logout для нового пользователя."""
+    email = f"bench-{uuid.uuid4().hex}@example.com"
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        try:
+            registration = {
+                "email": email,
+                "password": PASSWORD,
+                "phone": f"+{next(_phones)}",
+                "first_name": "Bench",
+                "last_name": "User",
+            }
+            _check(await recorder.step("register", client.post("/auth/register/", json=registration)))
+            token = sink.confirm_token(email)
+            if token is None:
+                raise StepFailed(f"Письмо с подтверждением для {email} не получено")
+            _check(await recorder.step("confirm", client.get("/auth/confirm", params={"token": token})))
+            credentials = {"email": email, "password": PASSWORD}
+            _check(await recorder.step("login", client.post("/auth/login/", json=credentials)))
+            for _ in range(me_requests):
+                _check(await recorder.step("me", client.get("/users/me/")))
+            _check(await recorder.step("refresh", client.post("/auth/refresh/")))
+            _check(await recorder.step("logout", client.get("/auth/logout/")))
+        except StepFailed:
+            if recorder.enabled:
+                recorder.journeys_failed += 1
+            return
+    if recorder.enabled:
+        recorder.journeys_completed += 1
@@ -0,0 +1,119 @@
+"""Локальные заменители внешних сервисов для нагрузочного стенда.
+
+Postgres - временная база на локальном сервере (создаётся и удаляется стендом), Redis - fakeredis
+в памяти процесса, SMTP - приёмник aiosmtpd, который складывает письма в память.
+"""
+
+import email
+import os
+import re
+import socket
+import time
+from contextlib import asynccontextmanager
+
+import asyncpg
+from aiosmtpd.controller import Controller
+
+CONFIRM_TOKEN_RE = re.compile(r"token=([0-9a-f-]{36})")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def configure_environment(database: str, smtp_port: int):
+    """Переменные окружения для Settings. Вызывается до импорта app."""
+    os.environ.update(
+        {
+            "POSTGRES_HOST": os.environ.get("BENCH_POSTGRES_HOST", "localhost"),
+            "POSTGRES_PORT": os.environ.get("BENCH_POSTGRES_PORT", "5432"),
+            "POSTGRES_USER": os.environ.get("BENCH_POSTGRES_USER", "postgres"),
+            "POSTGRES_PASSWORD": os.environ.get("BENCH_POSTGRES_PASSWORD", "postgres"),
+            "POSTGRES_DB": database,
+            "POSTGRES_REPLICA_HOST": "",
+            "SMTP_HOST": "127.0.0.1",
+            "SMTP_PORT": str(smtp_port),
+            "SMTP_USER": "bench@example.com",
+            "SMTP_PASSWORD": "",
+            "SMTP_START_TLS": "false",
+            "DOMAIN": "http://testserver",
+            "REDIRECT_URL": "docs",
+            "RATE_LIMIT_ENABLED": "false",
+            "EMAIL_OUTBOX_ENABLED": "false",
+            "REDIS_CLIENT_CACHE_ENABLED": "false",
+        }
+    )
+
+
+@asynccontextmanager
+async def throwaway_database():
+    """Создать пустую базу на сервере BENCH_POSTGRES_* и удалить её после прогона."""
+    database = f"bench_{os.getpid()}_{int(time.time())}"
+    admin = await asyncpg.connect(
+        host=os.environ.get("BENCH_POSTGRES_HOST", "localhost"),
+        port=int(os.environ.get("BENCH_POSTGRES_PORT", "5432")),
+        user=os.environ.get("BENCH_POSTGRES_USER", "postgres"),
+        password=os.environ.get("BENCH_POSTGRES_PASSWORD", "postgres"),
+        database="postgres",
+    )
+    try:
+        await admin.execute(f'CREATE DATABASE "{database}"')
+        yield database
+    finally:
+        await admin.execute(f'DROP DATABASE IF EXISTS "{database}" WITH (FORCE)')
+        await admin.close()
+
+
+async def create_schema():
+    from app.config.database import Base, engine
+    from app.models.user import User  # noqa: F401 - регистрирует таблицу в Base.metadata
+
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+
+def use_fake_redis():
+    """Подменить пул redis_for_auth на fakeredis до старта lifespan приложения."""
+    from fakeredis import FakeServer
+    from fakeredis.aioredis import FakeConnection
+    from redis import asyncio as aioredis
+
+    from app.config.redis import redis_for_auth
+
+    pool = aioredis.ConnectionPool(connection_class=FakeConnection, server=FakeServer(), decode_responses=True)
+    redis_for_auth._connection_pool = pool
+    redis_for_auth.connection_pool = pool
+
+
+class MailSink:
+    """Обработчик aiosmtpd: запоминает последнее письмо каждому получателю."""
+
+    def __init__(self):
+        self.received = 0
+        self._bodies: dict[str, str] = {}
+
+    async def handle_DATA(self, server, session, envelope):
+        message = email.message_from_bytes(envelope.content)
+        body = message.get_payload(decode=True).decode(message.get_content_charset() or "utf-8")
+        for recipient in envelope.rcpt_tos:
+            self._bodies[recipient] = body
+        self.received += 1
+        return "250 Message accepted for delivery"
+
+    def confirm_token(self, recipient: str) -> str | None:
+        body = self._bodies.pop(recipient, "")
+        match = CONFIRM_TOKEN_RE.search(body)
+        return match.group(1) if match else None
+
+
+@asynccontextmanager
+async def smtp_sink(port: int):
+    sink = MailSink()
+    controller = Controller(sink, hostname="127.0.0.1", port=port)
+    controller.start()
+    try:
+        yield sink
+    finally:
+        controller.stop()
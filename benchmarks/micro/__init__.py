@@ -0,0 +1,5 @@
+import os
+
+# Обязательные настройки без .env. Задаются при импорте пакета - раньше, чем любой модуль app прочитает settings
+for name, value in {"SMTP_PASSWORD": "", "DOMAIN": "http://testserver", "REDIRECT_URL": "docs"}.items():
+    os.environ.setdefault(name, value)
@@ -0,0 +1,89 @@
+"""Микробенчмарки примитивов безопасности и сериализации.
+
+python -m benchmarks.micro run --save-baseline
+python -m benchmarks.micro run --compare --threshold 0.1
+python -m benchmarks.micro calibrate-bcrypt --target-ms 250
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+from pathlib import Path
+
+from benchmarks.micro.harness import compare, measure
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Микробенчмарки примитивов сервиса")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Замерить примитивы")
+    run.add_argument("--filter", default="", help="Замерять только операции, в имени которых есть подстрока")
+    run.add_argument("--repeats", type=int, default=7, help="Число замеров каждой операции")
+    run.add_argument("--warmup", type=float, default=1.0, help="Прогрев каждой операции, секунд")
+    run.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="Файл с базовыми результатами")
+    run.add_argument("--save-baseline", action="store_true", help="Записать результаты как базовые")
+    run.add_argument("--compare", action="store_true", help="Сравнить с базовыми, код 1 при регрессии")
+    run.add_argument("--threshold", type=float, default=0.10, help="Допустимое замедление медианы, доля")
+
+    calibrate = commands.add_parser("calibrate-bcrypt", help="Подобрать cost factor bcrypt под целевую задержку")
+    calibrate.add_argument("--target-ms", type=float, default=250, help="Целевое время проверки пароля, мс")
+    return parser.parse_args()
+
+
+def machine() -> dict:
+    return {"python": platform.python_version(), "platform": platform.platform(), "cpu_count": os.cpu_count()}
+
+
+async def run(args: argparse.Namespace) -> int:
+    if args.compare and not args.baseline.exists():
+        print(
+            f"Нет базовых результатов {args.baseline}: сначала выполните "
+            "python -m benchmarks.micro run --save-baseline",
+            file=sys.stderr,
+        )
+        return 2
+
+    from app.utils.hashing import password_hasher
+    from benchmarks.micro.cases import build_cases
+
+    results = {}
+    try:
+        for case in await build_cases():
+            if args.filter in case.name:
+                results[case.name] = await measure(case, args.repeats, args.warmup)
+                print(f"{case.name:<36} {results[case.name]['median_us']:>14.3f} us", file=sys.stderr)
+    finally:
+        await password_hasher.shutdown()
+
+    report = {"machine": machine(), "results": results}
+    exit_code = 0
+    if args.compare:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        report["comparison"] = compare(results, baseline["results"], args.threshold)
+        if any(row["status"] == "regressed" for row in report["comparison"]):
+            exit_code = 1
+    if args.save_baseline:
+        baseline = {"machine": report["machine"], "results": results}
+        args.baseline.write_text(json.dumps(baseline, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return exit_code
+
+
+def main() -> int:
+    args = parse_args()
+    if args.command == "calibrate-bcrypt":
+        from benchmarks.micro.calibrate import calibrate_bcrypt
+
+        print(json.dumps({"machine": machine(), **calibrate_bcrypt(args.target_ms)}, indent=2))
+        return 0
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,35 @@
+import statistics
+import time
+
+from passlib.hash import bcrypt
+
+from benchmarks.micro.cases import PASSWORD
+
+
+def _verify_seconds(rounds: int, samples: int) -> float:
+    handler = bcrypt.using(rounds=rounds)
+    password_hash = handler.hash(PASSWORD)
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        handler.verify(PASSWORD, password_hash)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def calibrate_bcrypt(target_ms: float, samples: int = 3, min_rounds: int = 8, max_rounds: int = 16) -> dict:
+    """Наибольший cost factor bcrypt, при котором проверка пароля на этой машине укладывается в target_ms."""
+    measurements = {}
+    recommended = None
+    for rounds in range(min_rounds, max_rounds + 1):
+        elapsed_ms = _verify_seconds(rounds, samples) * 1000
+        measurements[str(rounds)] = round(elapsed_ms, 2)
+        if elapsed_ms > target_ms:
+            break
+        recommended = rounds
+    return {
+        "target_ms": target_ms,
+        "current_rounds": bcrypt.default_rounds,
+        "recommended_rounds": recommended,
+        "verify_ms": measurements,
+    }
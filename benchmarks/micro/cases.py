@@ -0,0 +1,92 @@
+"""Замеряемые примитивы: bcrypt, выпуск и проверка JWT, валидация и сериализация схем."""
+
+import json
+import uuid
+
+from pydantic import TypeAdapter
+
+from app.models.user import User
+from app.schemas.user import SLoginAnswer, SUserMe, SUserRegister
+from app.utils.hashing import password_hasher
+from app.utils.security import create_access_token, decode_token, get_password_hash, token_cache, verify_password
+from app.utils.serialization import login_answer_serializer, user_me_serializer
+from benchmarks.micro.harness import Case
+
+PASSWORD = "bench-password"
+REGISTER_PAYLOAD = {
+    "email": "user@example.com",
+    "password": PASSWORD,
+    "phone": "+7322222222",
+    "first_name": "Иван",
+    "last_name": "Иванов",
+}
+
+
+def sample_user(password_hash: str) -> User:
+    return User(
+        id=uuid.uuid4(),
+        email="user@example.com",
+        password=password_hash,
+        phone="+7322222222",
+        first_name="Иван",
+        last_name="Иванов",
+        is_user=True,
+        is_active=True,
+        is_admin=False,
+    )
+
+
+async def build_cases() -> list[Case]:
+    password_hasher.start()
+    password_hash = await get_password_hash(PASSWORD)
+    claims = {"sub": str(uuid.uuid4()), "fam": uuid.uuid4().hex[:16], "rid": uuid.uuid4().hex[:16]}
+    token = await create_access_token(claims)
+    user = sample_user(password_hash)
+    me_adapter = TypeAdapter(SUserMe)
+    login_adapter = TypeAdapter(SLoginAnswer)
+    tokens = {"access_token": token, "refresh_token": token}
+
+    async def hash_password():
+        await get_password_hash(PASSWORD)
+
+    async def check_password():
+        await verify_password(PASSWORD, password_hash)
+
+    async def issue_access_token():
+        await create_access_token(claims)
+
+    async def decode_uncached():
+        token_cache.clear()
+        await decode_token(token)
+
+    async def decode_cached():
+        await decode_token(token)
+
+    def validate_register():
+        SUserRegister.model_validate(REGISTER_PAYLOAD)
+
+    def serialize_me():
+        # Как в FastAPI: ORM -> response_model -> jsonable -> json.dumps
+        json.dumps(me_adapter.dump_python(me_adapter.validate_python(user, from_attributes=True), mode="json"))
+
+    def serialize_me_fast():
+        user_me_serializer.dumps(user)
+
+    def serialize_login():
+        json.dumps(login_adapter.dump_python(login_adapter.validate_python(tokens), mode="json"))
+
+    def serialize_login_fast():
+        login_answer_serializer.dumps(tokens)
+
+    return [
+        Case("bcrypt.hash", hash_password, number=2),
+        Case("bcrypt.verify", check_password, number=2),
+        Case("jwt.create_access_token", issue_access_token, number=2000),
+        Case("jwt.decode_token.uncached", decode_uncached, number=2000),
+        Case("jwt.decode_token.cached", decode_cached, number=20000),
+        Case("schema.SUserRegister.validate", validate_register, number=20000),
+        Case("schema.SUserMe.serialize", serialize_me, number=20000),
+        Case("schema.SUserMe.serialize_fast", serialize_me_fast, number=20000),
+        Case("schema.SLoginAnswer.serialize", serialize_login, number=20000),
+        Case("schema.SLoginAnswer.serialize_fast", serialize_login_fast, number=20000),
+    ]
@@ -0,0 +1,82 @@
+import gc
+import inspect
+import statistics
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+
+@dataclass
+class Case:
+    """Замеряемая операция. func - обычная или async-функция без аргументов, number - вызовов в одном замере."""
+
+    name: str
+    func: Callable[[], object]
+    number: int = 1000
+
+
+async def _sample(case: Case) -> float:
+    if inspect.iscoroutinefunction(case.func):
+        started = time.perf_counter()
+        for _ in range(case.number):
+            await case.func()
+        return time.perf_counter() - started
+    started = time.perf_counter()
+    for _ in range(case.number):
+        case.func()
+    return time.perf_counter() - started
+
+
+async def measure(case: Case, repeats: int, warmup_seconds: float) -> dict:
+    """Прогреть операцию, затем снять repeats замеров по case.number вызовов при выключенном GC."""
+    deadline = time.perf_counter() + warmup_seconds
+    await _sample(case)
+    while time.perf_counter() < deadline:
+        await _sample(case)
+
+    gc.collect()
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        samples = [await _sample(case) / case.number for _ in range(repeats)]
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    median = statistics.median(samples)
+    return {
+        "number": case.number,
+        "repeats": repeats,
+        "median_us": round(median * 1e6, 3),
+        "min_us": round(min(samples) * 1e6, 3),
+        "mean_us": round(statistics.fmean(samples) * 1e6, 3),
+        "stdev_us": round(statistics.stdev(samples) * 1e6, 3) if len(samples) > 1 else 0.0,
+        "ops_per_sec": round(1 / median, 1),
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[dict]:
+    """Сравнить медианы с базовыми. Операция считается регрессией, если стала медленнее больше чем на threshold."""
+    rows = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            rows.append({"case": name, "status": "new", "median_us": result["median_us"]})
+            continue
+        change = result["median_us"] / reference["median_us"] - 1
+        if change > threshold:
+            status = "regressed"
+        elif change < -threshold:
+            status = "improved"
+        else:
+            status = "ok"
+        rows.append(
+            {
+                "case": name,
+                "status": status,
+                "baseline_us": reference["median_us"],
+                "median_us": result["median_us"],
+                "change": round(change, 4),
+            }
+        )
+    return rows
@@ -0,0 +1,38 @@
+"""Add case-insensitive covering index on users email
+
+Revision ID: b7d41c9e2f58
+Revises: 63477ec21dc4
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b7d41c9e2f58"
+down_revision: Union[str, Sequence[str], None] = "63477ec21dc4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Уникальность без учёта регистра: миграция упадёт, если уже есть email, различающиеся только регистром.
+    # CONCURRENTLY не блокирует запись в users, но не может выполняться в транзакции
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_users_email_lower",
+            "users",
+            [sa.text("lower(email)")],
+            unique=True,
+            postgresql_include=["email", "id", "password", "is_active", "is_user", "is_admin"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_users_email_lower", table_name="users", postgresql_concurrently=True)
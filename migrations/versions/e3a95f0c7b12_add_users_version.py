@@ -0,0 +1,27 @@
+"""Add users version column
+
+Revision ID: e3a95f0c7b12
+Revises: b7d41c9e2f58
+Create Date: 2026-10-18 12:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e3a95f0c7b12"
+down_revision: Union[str, Sequence[str], None] = "b7d41c9e2f58"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("users", sa.Column("version", sa.Integer(), server_default=sa.text("1"), nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("users", "version")
@@ -0,0 +1,20 @@
+import os
+
+# Обязательные настройки без .env. Задаются до того, как тесты импортируют модули app
+for name, value in {"SMTP_PASSWORD": "", "DOMAIN": "http://testserver", "REDIRECT_URL": "docs"}.items():
+    os.environ.setdefault(name, value)
+
+import fakeredis  # noqa: E402
+import pytest  # noqa: E402
+
+from app.config.redis import RedisService  # noqa: E402
+
+
+@pytest.fixture
+def redis() -> RedisService:
+    """RedisService поверх fakeredis с поддержкой Lua: свой пустой сервер на каждый тест."""
+    service = RedisService("redis://localhost")
+    service.connection_pool = fakeredis.FakeAsyncRedis(
+        server=fakeredis.FakeServer(), decode_responses=True
+    ).connection_pool
+    return service
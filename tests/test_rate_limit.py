@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+from app.exceptions.security import TooManyRequestsError
+from app.utils.rate_limit import RateLimiter
+
+LIMITS = {"ip:1.2.3.4": 3, "global": 100}
+
+
+def test_rejects_with_retry_after_when_window_is_exhausted(redis):
+    limiter = RateLimiter(redis)
+
+    async def scenario():
+        for _ in range(3):
+            await limiter.check("login", LIMITS, window_seconds=3600)
+        with pytest.raises(TooManyRequestsError) as error:
+            await limiter.check("login", LIMITS, window_seconds=3600)
+        return error.value
+
+    error = asyncio.run(scenario())
+    assert error.status_code == 429
+    assert 1 <= int(error.headers["Retry-After"]) <= 3600
+    assert (limiter.allowed, limiter.rejected_redis) == (3, 1)
+
+
+def test_rejected_attempt_does_not_count(redis):
+    limiter = RateLimiter(redis)
+
+    async def scenario():
+        for _ in range(3):
+            await limiter.check("login", LIMITS, window_seconds=3600)
+        with pytest.raises(TooManyRequestsError):
+            await limiter.check("login", LIMITS, window_seconds=3600)
+        return [int(value) for value in await redis.mget(await redis.keys("ratelimit:*"))]
+
+    # Отказ не увеличивает ни один счётчик, включая не сработавший глобальный
+    assert sorted(asyncio.run(scenario())) == [3, 3]
+
+
+def test_blocked_key_is_rejected_locally(redis):
+    limiter = RateLimiter(redis)
+
+    async def scenario():
+        for _ in range(3):
+            await limiter.check("login", LIMITS, window_seconds=3600)
+        for _ in range(2):
+            with pytest.raises(TooManyRequestsError) as error:
+                await limiter.check("login", LIMITS, window_seconds=3600)
+        await limiter.check("login", {"ip:5.6.7.8": 3, "global": 100}, window_seconds=3600)
+        return error.value
+
+    error = asyncio.run(scenario())
+    assert error.status_code == 429 and int(error.headers["Retry-After"]) >= 1
+    assert (limiter.rejected_redis, limiter.rejected_local, limiter.allowed) == (1, 1, 4)
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.utils.refresh_tokens import ROTATION_ERRORS, RefreshTokenStore, RotationResult
+
+
+def rotate_error(store: RefreshTokenStore, *args) -> str:
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(store.rotate(*args))
+    assert error.value.status_code == 401
+    return error.value.detail
+
+
+def test_replaced(redis):
+    store = RefreshTokenStore(redis, ttl=100, grace=0)
+
+    async def scenario():
+        family_id, rotation_id = await store.issue(1)
+        new_rotation_id = await store.rotate(1, family_id, rotation_id)
+        return family_id, rotation_id, new_rotation_id, await redis.hget(store._key(1), family_id)
+
+    family_id, rotation_id, new_rotation_id, stored = asyncio.run(scenario())
+    assert new_rotation_id != rotation_id
+    current, _, previous, _ = stored.split(":")
+    assert (current, previous) == (new_rotation_id, rotation_id)
+    assert asyncio.run(store.rotate(1, family_id, new_rotation_id)) not in (rotation_id, new_rotation_id)
+
+
+def test_missing(redis):
+    store = RefreshTokenStore(redis, ttl=100, grace=0)
+    family_id, rotation_id = asyncio.run(store.issue(1))
+    assert rotate_error(store, 1, "unknown", rotation_id) == ROTATION_ERRORS[RotationResult.MISSING]
+    assert rotate_error(store, 2, family_id, rotation_id) == ROTATION_ERRORS[RotationResult.MISSING]
+
+
+def test_reused_revokes_family(redis):
+    store = RefreshTokenStore(redis, ttl=100, grace=0)
+    family_id, rotation_id = asyncio.run(store.issue(1))
+    other_family_id, other_rotation_id = asyncio.run(store.issue(1))
+    asyncio.run(store.rotate(1, family_id, rotation_id))
+
+    assert rotate_error(store, 1, family_id, rotation_id) == ROTATION_ERRORS[RotationResult.REUSED]
+    assert asyncio.run(redis.hexists(store._key(1), family_id)) == 0
+    # Даже текущая ротация отозванного семейства больше не принимается, остальные устройства не затронуты
+    assert rotate_error(store, 1, family_id, rotation_id) == ROTATION_ERRORS[RotationResult.MISSING]
+    assert asyncio.run(store.rotate(1, other_family_id, other_rotation_id))
+
+
+def test_expired(redis):
+    store = RefreshTokenStore(redis, ttl=100, grace=0)
+    family_id, rotation_id = asyncio.run(store.issue(1))
+    asyncio.run(redis.hset(store._key(1), family_id, f"{rotation_id}:1"))
+
+    assert rotate_error(store, 1, family_id, rotation_id) == ROTATION_ERRORS[RotationResult.EXPIRED]
+    assert asyncio.run(redis.hexists(store._key(1), family_id)) == 0
+
+
+def test_concurrent_within_grace(redis):
+    store = RefreshTokenStore(redis, ttl=100, grace=60)
+    family_id, rotation_id = asyncio.run(store.issue(1))
+    new_rotation_id = asyncio.run(store.rotate(1, family_id, rotation_id))
+
+    # Второй запрос с тем же токеном получает текущую ротацию, семейство не отзывается
+    assert asyncio.run(store.rotate(1, family_id, rotation_id)) == new_rotation_id
+    assert asyncio.run(store.rotate(1, family_id, new_rotation_id)) != new_rotation_id
+
+
+def test_reused_after_grace(redis):
+    store = RefreshTokenStore(redis, ttl=100, grace=60)
+    family_id, rotation_id = asyncio.run(store.issue(1))
+    new_rotation_id = asyncio.run(store.rotate(1, family_id, rotation_id))
+    stored = asyncio.run(redis.hget(store._key(1), family_id))
+    asyncio.run(redis.hset(store._key(1), family_id, stored.rsplit(":", 1)[0] + ":1"))
+
+    assert rotate_error(store, 1, family_id, rotation_id) == ROTATION_ERRORS[RotationResult.REUSED]
+    assert rotate_error(store, 1, family_id, new_rotation_id) == ROTATION_ERRORS[RotationResult.MISSING]